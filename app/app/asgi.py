@@ -0,0 +1,21 @@
+"""
+ASGI config for app project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.1 has no ASGI support of its own, so the WSGI handler is served by
+asgiref's adapter from a bounded thread pool (core.asgi.ThreadPoolWsgiToAsgi).
+Run it with an ASGI server, e.g. ``uvicorn app.asgi:application``.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import ThreadPoolWsgiToAsgi
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+application = ThreadPoolWsgiToAsgi(
+    get_wsgi_application(), max_workers=settings.ASGI['THREADS']
+)
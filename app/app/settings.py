@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -128,3 +130,92 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 AUTH_USER_MODEL = 'core.User'
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+}
+
+# Caches every worker process reads and invalidates, on the memcached
+# server at CACHE_LOCATION.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+}
+
+# Per-user versioned cache of recipe API responses
+RECIPE_CACHE = {
+    'BACKEND': 'core.cache.DjangoCache',
+    'OPTIONS': {
+        'alias': 'shared',
+        'timeout': 300,
+    },
+}
+
+# Per-user similarity graphs of recipe.graph, updated in place on
+# relation changes, so the backend must keep objects in process. Their
+# versions live in RECIPE_CACHE: a graph that missed a change made by
+# another process is rebuilt. Changes apply when their transaction
+# commits, so rolled back ones never reach a graph.
+RECIPE_GRAPH_CACHE = {
+    'BACKEND': 'core.cache.LRUCache',
+    'OPTIONS': {
+        'max_entries': 64,
+        'timeout': 300,
+    },
+}
+
+# Token -> user lookups of user.authentication.CachedTokenAuthentication
+TOKEN_AUTH_CACHE = {
+    'BACKEND': 'core.cache.DjangoCache',
+    'OPTIONS': {
+        'alias': 'shared',
+        'timeout': 60,
+    },
+}
+
+# Single process runs (LOCAL_CACHES=1) and the test suite keep the shared
+# caches in a bounded in-process LRU instead. It only sees invalidations
+# made by its own process, so never use it with several workers.
+if os.environ.get('LOCAL_CACHES') == '1' or sys.argv[1:2] == ['test']:
+    RECIPE_CACHE = {
+        'BACKEND': 'core.cache.LRUCache',
+        'OPTIONS': {
+            'max_entries': 1024,
+            'timeout': 300,
+        },
+    }
+    TOKEN_AUTH_CACHE = {
+        'BACKEND': 'core.cache.LRUCache',
+        'OPTIONS': {
+            'max_entries': 10000,
+            'timeout': 60,
+        },
+    }
+
+# Per endpoint request histograms of core.middleware.MetricsMiddleware,
+# served in the Prometheus text format at /metrics/. Every process keeps
+# its own histograms, so scrape each worker. SAMPLE_RATE is the share of
+# requests measured. /metrics/ answers staff users and the comma separated
+# METRICS_ALLOWED_IPS, none by default: behind a reverse proxy every client
+# shares the proxy's address, so list the scraper only where it reaches the
+# workers directly.
+METRICS = {
+    'SAMPLE_RATE': float(os.environ.get('METRICS_SAMPLE_RATE', 1.0)),
+    'ALLOWED_IPS': [
+        ip for ip in os.environ.get(
+            'METRICS_ALLOWED_IPS', ''
+        ).split(',') if ip
+    ],
+}
+
+# app.asgi serves Django from a pool of THREADS threads, each holding its
+# own database connection; the event loop keeps slow clients off them.
+ASGI = {
+    'THREADS': int(os.environ.get('ASGI_THREADS', 16)),
+}
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import SyncToAsync
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """asgiref's WSGI adapter calling the application from a thread pool
+
+    asgiref runs its sync code thread sensitively, on one thread shared by
+    every request, which would serve a single request at a time. Requests
+    run on ``max_workers`` threads here instead, each holding its own
+    database connection, while the event loop reads slow request bodies
+    and writes responses.
+    """
+
+    def __init__(self, wsgi_application, max_workers=16):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        instance = WsgiToAsgiInstance(self.wsgi_application)
+        run_wsgi_app = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+        instance.run_wsgi_app = SyncToAsync(
+            partial(run_wsgi_app, instance),
+            thread_sensitive=False, executor=self.executor
+        )
+        await instance(scope, receive, send)
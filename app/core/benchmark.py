@@ -0,0 +1,226 @@
+import random
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.db import bulk_create_with_pks
+from core.models import Tag, Ingredient, Recipe
+from recipe.cache import bump_version
+from recipe.search import update_search_vectors
+
+
+PERCENTILES = (50, 90, 99)
+
+
+def generate_fixtures(users=1, recipes=100, attrs=10, links=3,
+                      password='benchmark', seed=0):
+    """Create users x recipes x attrs rows with bulk inserts
+
+    Every recipe links ``links`` random tags and ingredients of its owner.
+    Returns the created users.
+    """
+    rng = random.Random(seed)
+    prefix = uuid.uuid4().hex[:8]
+    password = make_password(password)
+    created = bulk_create_with_pks(get_user_model(), [
+        get_user_model()(
+            email=f'bench-{prefix}-{i}@example.com',
+            username=f'bench-{prefix}-{i}',
+            password=password
+        )
+        for i in range(users)
+    ])
+
+    for user in created:
+        tags = bulk_create_with_pks(Tag, [
+            Tag(user=user, name=f'Tag {i}') for i in range(attrs)
+        ])
+        ingredients = bulk_create_with_pks(Ingredient, [
+            Ingredient(user=user, name=f'Ingredient {i}')
+            for i in range(attrs)
+        ])
+        objs = bulk_create_with_pks(Recipe, [
+            Recipe(
+                user=user,
+                title=f'Recipe {i}',
+                time_minutes=rng.randint(5, 180),
+                price=rng.randint(100, 99999) / 100,
+                link=f'https://example.com/{i}' if i % 2 else ''
+            )
+            for i in range(recipes)
+        ])
+
+        for relation, targets in (('tags', tags),
+                                  ('ingredients', ingredients)):
+            through = getattr(Recipe, relation).through
+            column = f'{targets[0]._meta.model_name}_id' if targets else ''
+            through.objects.bulk_create([
+                through(recipe_id=recipe.pk, **{column: target.pk})
+                for recipe in objs
+                for target in rng.sample(targets, min(links, len(targets)))
+            ])
+
+    owned = {'user__in': created}
+    Tag.objects.recount_recipes(Tag.objects.filter(**owned).values('pk'))
+    Ingredient.objects.recount_recipes(
+        Ingredient.objects.filter(**owned).values('pk')
+    )
+    update_search_vectors(Recipe.objects.filter(**owned))
+    return created
+
+
+def percentile(values, pct):
+    """Return the pct percentile of the values, linearly interpolated"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower
+    )
+
+
+class Scenario:
+    """One timed request shape
+
+    ``request`` returns the (method, url, data) of the i-th request.
+    Uncached scenarios invalidate the user's response cache before
+    every request, outside of the timing.
+    """
+
+    def __init__(self, name, request, cached=False):
+        self.name = name
+        self.request = request
+        self.cached = cached
+
+
+def default_scenarios(user):
+    """Return the scenarios covering the recipe and user endpoints"""
+    recipe = Recipe.objects.filter(user=user).order_by('pk').first()
+    tag_ids = list(Tag.objects.filter(user=user).values_list(
+        'pk', flat=True
+    )[:3])
+    ingredient_ids = list(Ingredient.objects.filter(user=user).values_list(
+        'pk', flat=True
+    )[:3])
+
+    def new_recipe(i):
+        return {'title': f'Bench {i}', 'time_minutes': 10, 'price': '4.50',
+                'tags': tag_ids, 'ingredients': ingredient_ids}
+
+    recipe_url = reverse('recipe:recipe-detail', args=[recipe.pk])
+    return [
+        Scenario('recipe list', lambda i: (
+            'get', reverse('recipe:recipe-list'), None
+        )),
+        Scenario('recipe list cached', lambda i: (
+            'get', reverse('recipe:recipe-list'), None
+        ), cached=True),
+        Scenario('recipe list filtered', lambda i: (
+            'get', reverse('recipe:recipe-list'),
+            {'tags': ','.join(map(str, tag_ids)), 'max_time': 60}
+        )),
+        Scenario('recipe search', lambda i: (
+            'get', reverse('recipe:recipe-list'), {'search': 'recipe 1'}
+        )),
+        Scenario('recipe retrieve', lambda i: ('get', recipe_url, None)),
+        Scenario('recipe create', lambda i: (
+            'post', reverse('recipe:recipe-list'), new_recipe(i)
+        )),
+        Scenario('recipe update', lambda i: (
+            'patch', recipe_url, {'time_minutes': 10 + i % 50}
+        )),
+        Scenario('tag list', lambda i: (
+            'get', reverse('recipe:tag-list'), None
+        )),
+        Scenario('tag create', lambda i: (
+            'post', reverse('recipe:tag-list'), {'name': f'Bench tag {i}'}
+        )),
+        Scenario('ingredient list', lambda i: (
+            'get', reverse('recipe:ingredient-list'), None
+        )),
+        Scenario('ingredient create', lambda i: (
+            'post', reverse('recipe:ingredient-list'),
+            {'name': f'Bench ingredient {i}'}
+        )),
+        Scenario('user retrieve', lambda i: (
+            'get', reverse('user:me'), None
+        )),
+        Scenario('user update', lambda i: (
+            'patch', reverse('user:me'), {'username': f'bench{i}'}
+        )),
+        Scenario('user token', lambda i: (
+            'post', reverse('user:token'),
+            {'email': user.email, 'password': 'benchmark'}
+        )),
+    ]
+
+
+def run_scenarios(user, scenarios, requests=20, warmup=2):
+    """Time every scenario, returning latency percentiles and queries"""
+    client = APIClient()
+    token, created = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    results = {}
+    for scenario in scenarios:
+        timings, queries, statuses = [], [], set()
+        for i in range(warmup + requests):
+            method, url, data = scenario.request(i)
+            if not scenario.cached:
+                bump_version(user.pk)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, data, format=(
+                    None if method == 'get' else 'json'
+                ))
+                elapsed = time.perf_counter() - started
+            if i < warmup:
+                continue
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+            statuses.add(response.status_code)
+
+        result = {
+            f'p{pct}_ms': round(percentile(timings, pct), 3)
+            for pct in PERCENTILES
+        }
+        result['mean_ms'] = round(sum(timings) / len(timings), 3)
+        result['queries'] = max(queries)
+        result['statuses'] = sorted(statuses)
+        results[scenario.name] = result
+    return results
+
+
+def compare(results, baseline, threshold=0.2):
+    """Return the regressions of the results against a baseline
+
+    A scenario regresses when its requests fail, when its median latency
+    grows by more than the threshold ratio or when it runs more queries.
+    """
+    regressions = []
+    for name, result in results.items():
+        failed = [status for status in result['statuses'] if status >= 400]
+        if failed:
+            regressions.append(f'{name}: responded {failed}')
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result['p50_ms'] > before['p50_ms'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p50 {before["p50_ms"]}ms -> {result["p50_ms"]}ms'
+            )
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f'{name}: {before["queries"]} -> {result["queries"]} queries'
+            )
+    return regressions
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+DEFAULT_BACKEND = 'core.cache.LRUCache'
+
+_MISSING = object()
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+class LRUCache:
+    """Thread safe in-process cache bounded by entry count and age"""
+
+    def __init__(self, max_entries=1024, timeout=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value, refreshing its recency"""
+        with self._lock:
+            value, expires = self._data.get(key, (_MISSING, None))
+            if value is _MISSING:
+                return default
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=_MISSING):
+        """Store a value, evicting the least recently used entries"""
+        if timeout is _MISSING:
+            timeout = self.timeout
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def incr(self, key, delta=1):
+        """Increment a cached number, raising ValueError when missing"""
+        with self._lock:
+            value, expires = self._data.get(key, (_MISSING, None))
+            if value is _MISSING or (
+                    expires is not None and expires <= time.monotonic()):
+                raise ValueError(f"Key '{key}' not found")
+            self._data[key] = (value + delta, expires)
+            self._data.move_to_end(key)
+            return value + delta
+
+    def delete(self, key):
+        """Remove a key if it is cached"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoCache:
+    """Adapter exposing one of the configured Django caches"""
+
+    def __init__(self, alias='default', timeout=None):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key, default=None):
+        """Return the cached value"""
+        return self.cache.get(key, default)
+
+    def set(self, key, value, timeout=_MISSING):
+        """Store a value"""
+        if timeout is _MISSING:
+            timeout = self.timeout
+        self.cache.set(key, value, timeout)
+
+    def incr(self, key, delta=1):
+        """Increment a cached number, raising ValueError when missing"""
+        return self.cache.incr(key, delta)
+
+    def delete(self, key):
+        """Remove a key"""
+        self.cache.delete(key)
+
+    def clear(self):
+        """Remove every entry"""
+        self.cache.clear()
+
+
+def get_cache(setting):
+    """Return the cache backend configured by the given setting"""
+    with _instances_lock:
+        if setting not in _instances:
+            config = getattr(settings, setting, {})
+            backend = import_string(config.get('BACKEND', DEFAULT_BACKEND))
+            _instances[setting] = backend(**config.get('OPTIONS', {}))
+        return _instances[setting]
+
+
+@receiver(setting_changed)
+def reset_cache(setting, **kwargs):
+    """Rebuild a cache backend when its setting is overridden"""
+    with _instances_lock:
+        _instances.pop(setting, None)
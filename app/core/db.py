@@ -0,0 +1,39 @@
+from django.db import connections, router
+
+
+def bulk_create_with_pks(model, objs, batch_size=None):
+    """Insert objects in bulk and return them with primary keys set
+
+    Only backends that can return ids from a bulk INSERT (PostgreSQL)
+    take the single statement path, the others save row by row.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_ids_from_bulk_insert:
+        return model.objects.bulk_create(objs, batch_size=batch_size)
+
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+def delete_rows(queryset):
+    """Delete the rows of a queryset with one DELETE, sending no signals
+
+    Django will not fast delete models with m2m_changed listeners, such
+    as the recipe through tables: it selects their rows and deletes them
+    in batches of 100. Only use this for rows no cascade or delete signal
+    depends on.
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to size consecutive items of the iterable"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
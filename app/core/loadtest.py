@@ -0,0 +1,178 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+from core.benchmark import percentile
+
+
+MODES = ('wsgi', 'asgi')
+HOST = '127.0.0.1'
+
+
+def server_command(mode, port, threads):
+    """Return the command line serving the project in the mode
+
+    WSGI is served by gunicorn's threaded worker, ASGI by uvicorn running
+    app.asgi, both from one process with ``threads`` request threads.
+    """
+    if mode == 'wsgi':
+        return [
+            sys.executable, '-m', 'gunicorn', 'app.wsgi:application',
+            '--bind', f'{HOST}:{port}', '--workers', '1',
+            '--worker-class', 'gthread', '--threads', str(threads),
+            '--log-level', 'warning',
+        ]
+    return [
+        sys.executable, '-m', 'uvicorn', 'app.asgi:application',
+        '--host', HOST, '--port', str(port), '--workers', '1',
+        '--no-access-log', '--log-level', 'warning',
+    ]
+
+
+def free_port():
+    """Return a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """Server process of the project, listening while the block runs
+
+    The process inherits the environment, settings module included, so it
+    reads the database the calling command wrote its fixtures to. It runs
+    one worker, so its caches stay in process. Its output goes to ``log``,
+    a file or subprocess.DEVNULL, if given.
+    """
+    startup_timeout = 30
+
+    def __init__(self, mode, threads, log=None):
+        self.mode = mode
+        self.threads = threads
+        self.log = log
+        self.port = free_port()
+        self.process = None
+
+    def __enter__(self):
+        env = dict(
+            os.environ, ASGI_THREADS=str(self.threads), LOCAL_CACHES='1'
+        )
+        self.process = subprocess.Popen(
+            server_command(self.mode, self.port, self.threads),
+            cwd=settings.BASE_DIR, env=env,
+            stdout=self.log, stderr=self.log
+        )
+        try:
+            self.wait_until_listening()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def wait_until_listening(self):
+        """Block until the server accepts connections"""
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f'{self.mode} server exited with {self.process.returncode}'
+                )
+            try:
+                socket.create_connection((HOST, self.port), 0.1).close()
+                return
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'{self.mode} server did not start')
+                time.sleep(0.1)
+
+    def stop(self):
+        """Terminate the server process"""
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def build_request(path, port, headers=None):
+    """Return the bytes of a GET request closing its connection"""
+    lines = [f'GET {path} HTTP/1.1', f'Host: {HOST}:{port}',
+             'Connection: close']
+    lines.extend(f'{name}: {value}' for name, value in
+                 (headers or {}).items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+async def slow_request(port, request, client_delay):
+    """Send a request the way a slow client does, return the status
+
+    The client pauses ``client_delay`` seconds halfway through sending the
+    request and again before reading the response, so a server reading
+    requests on its worker threads holds one for the pause.
+    """
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        half = len(request) // 2
+        writer.write(request[:half])
+        await writer.drain()
+        await asyncio.sleep(client_delay)
+        writer.write(request[half:])
+        await writer.drain()
+        await asyncio.sleep(client_delay)
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    return int(status_line.split(b' ', 2)[1])
+
+
+def summarize(latencies, statuses, seconds, **meta):
+    """Return the throughput and latency percentiles of a run"""
+    result = dict(meta)
+    result.update({
+        'requests': len(latencies),
+        'seconds': round(seconds, 3),
+        'throughput': round(len(latencies) / seconds, 1) if seconds else 0,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'statuses': sorted(set(statuses)),
+    })
+    return result
+
+
+def run_load(port, path, headers=None, requests=200, concurrency=50,
+             client_delay=0.05, **meta):
+    """Load a listening server with concurrent slow clients over sockets"""
+    request = build_request(path, port, headers)
+    latencies, statuses = [], []
+    remaining = [requests]
+
+    async def client():
+        while remaining[0]:
+            remaining[0] -= 1
+            begun = time.perf_counter()
+            statuses.append(await slow_request(port, request, client_delay))
+            latencies.append((time.perf_counter() - begun) * 1000)
+
+    async def clients():
+        await asyncio.gather(*(client() for i in range(concurrency)))
+
+    loop = asyncio.new_event_loop()
+    begun = time.perf_counter()
+    try:
+        loop.run_until_complete(clients())
+    finally:
+        loop.close()
+    seconds = time.perf_counter() - begun
+    return summarize(
+        latencies, statuses, seconds, concurrency=concurrency, **meta
+    )
@@ -0,0 +1,80 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.benchmark import (
+    compare, default_scenarios, generate_fixtures, run_scenarios
+)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the API on generated data"""
+    help = 'Time the recipe and user endpoints on generated fixtures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--recipes', type=int, default=1000,
+                            help='Recipes per user')
+        parser.add_argument('--attrs', type=int, default=20,
+                            help='Tags and ingredients per user')
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Timed requests per scenario')
+        parser.add_argument('--output', help='Write the results as JSON')
+        parser.add_argument('--compare',
+                            help='Baseline JSON to check for regressions')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed median latency growth ratio')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the generated rows')
+
+    def handle(self, *args, **options):
+        hosts = list(settings.ALLOWED_HOSTS) + ['testserver']
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=hosts):
+            users = generate_fixtures(
+                users=options['users'],
+                recipes=options['recipes'],
+                attrs=options['attrs']
+            )
+            results = run_scenarios(
+                users[0], default_scenarios(users[0]),
+                requests=options['requests']
+            )
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<24} p50 {result["p50_ms"]:>9.2f}ms  '
+                f'p90 {result["p90_ms"]:>9.2f}ms  '
+                f'p99 {result["p99_ms"]:>9.2f}ms  '
+                f'{result["queries"]:>3} queries'
+            )
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'vendor': connection.vendor,
+                'users': options['users'],
+                'recipes': options['recipes'],
+                'attrs': options['attrs'],
+                'requests': options['requests'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)['results']
+            regressions = compare(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    'Regressions found:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions found!'))
@@ -0,0 +1,119 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.filters import AssignedOnlyFilterBackend, RecipeFilterBackend
+from recipe.pagination import KeysetPagination
+from recipe.views import TagViewSet, IngredientViewSet, RecipeViewSet
+
+
+# Plan fragments showing a table read without an index
+SCANS = {
+    'postgresql': re.compile(r'Seq Scan'),
+    'sqlite': re.compile(r'\bSCAN\b'),
+}
+# Plan fragments showing rows sorted instead of read in index order
+SORTS = {
+    'postgresql': re.compile(r'\bSort\b'),
+    'sqlite': re.compile(r'TEMP B-TREE'),
+}
+
+
+def list_queries(user_id=0, page_size=50):
+    """Return (label, queryset) pairs for the first and a seek page"""
+    queries = []
+    for model, view in ((Tag, TagViewSet),
+                        (Ingredient, IngredientViewSet),
+                        (Recipe, RecipeViewSet)):
+        queryset = model.objects.filter(user_id=user_id)
+        position = ['' if field.lstrip('-') != 'id' else 0
+                    for field in view.ordering]
+        seek = KeysetPagination.seek_filter(view.ordering, position)
+        name = model._meta.model_name
+        queries.append((
+            f'{name} list',
+            queryset.order_by(*view.ordering)[:page_size]
+        ))
+        queries.append((
+            f'{name} list after cursor',
+            queryset.filter(seek).order_by(*view.ordering)[:page_size]
+        ))
+    return queries
+
+
+def filter_queries(user_id=0, page_size=50):
+    """Return (label, queryset) pairs for the list filters
+
+    Filters narrow the rows through their own indexes and the remaining
+    rows may then be sorted, so only scans count as regressions here.
+    """
+    recipes = Recipe.objects.filter(user_id=user_id)
+    queries = [
+        (f'recipe list filtered by {relation} ({match})',
+         recipes.filter(pk__in=RecipeFilterBackend.matching_recipes(
+             relation, [1, 2], match
+         )))
+        for relation in RecipeFilterBackend.relations
+        for match in ('any', 'all')
+    ]
+    queries += [
+        ('recipe list filtered by max_time',
+         recipes.filter(time_minutes__lte=30)),
+        ('recipe list filtered by price_lt', recipes.filter(price__lt=10)),
+    ]
+    queries = [(label, queryset.order_by(*RecipeViewSet.ordering))
+               for label, queryset in queries]
+
+    for model, view in ((Tag, TagViewSet), (Ingredient, IngredientViewSet)):
+        queries.append((
+            f'{model._meta.model_name} list assigned only',
+            AssignedOnlyFilterBackend.assigned(
+                model.objects.filter(user_id=user_id), view.recipe_relation
+            ).order_by(*view.ordering)
+        ))
+    return [(label, queryset[:page_size]) for label, queryset in queries]
+
+
+def find_regressions(vendor, plan, allow_sort=False):
+    """Return the plan lines showing a scan or an explicit sort"""
+    patterns = [SCANS[vendor]]
+    if not allow_sort:
+        patterns.append(SORTS[vendor])
+    return [line.strip() for line in plan.splitlines()
+            if any(pattern.search(line) for pattern in patterns)]
+
+
+class Command(BaseCommand):
+    """Django command to check list queries are served by their indexes"""
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SCANS:
+            raise CommandError(f'Unsupported database vendor: {vendor}')
+
+        failures = []
+        with transaction.atomic():
+            if vendor == 'postgresql':
+                # Small tables make sequential scans look cheapest, only
+                # fall back to one when no index can serve the query.
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            checks = [(label, queryset, False)
+                      for label, queryset in list_queries()]
+            checks += [(label, queryset, True)
+                       for label, queryset in filter_queries()]
+            for label, queryset, allow_sort in checks:
+                plan = queryset.explain()
+                problems = find_regressions(vendor, plan, allow_sort)
+                if problems:
+                    failures.append(f'{label}: {"; ".join(problems)}')
+                else:
+                    self.stdout.write(f'{label}: ok')
+
+        if failures:
+            raise CommandError(
+                'Query plans regressed:\n' + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('Query plans use indexes'))
@@ -0,0 +1,67 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.importer import FORMATS, RecipeImporter, format_of, parse_rows
+
+
+class Command(BaseCommand):
+    """Django command to import a NDJSON or CSV dump of recipes"""
+    help = 'Import recipes of a user from a NDJSON or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True,
+                            help='Email of the user owning the recipes')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--checkpoint',
+                            help='File recording the rows already imported')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["user"]}')
+
+        checkpoint = options['checkpoint']
+        start = self.read_checkpoint(checkpoint)
+        if start:
+            self.stdout.write(f'Resuming after row {start}')
+
+        def report(result):
+            self.stdout.write(
+                f'{result.checkpoint} rows read, {result.imported} imported, '
+                f'{result.failed} failed ({result.rows_per_second} rows/sec)'
+            )
+            if checkpoint:
+                with open(checkpoint, 'w') as file:
+                    file.write(str(result.checkpoint))
+
+        fmt = options['format'] or format_of(options['path'])
+        importer = RecipeImporter(user, batch_size=options['batch_size'])
+        with open(options['path'], 'rb') as file:
+            result = importer.run(
+                parse_rows(file, fmt), start=start, on_batch=report
+            )
+
+        for error in result.errors:
+            self.stderr.write(f'Line {error["line"]}: {error["errors"]}')
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.imported} recipes, {result.failed} failed '
+            f'({result.rows_per_second} rows/sec)'
+        ))
+
+    @staticmethod
+    def read_checkpoint(path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as file:
+            try:
+                return int(file.read().strip() or 0)
+            except ValueError:
+                raise CommandError(f'Invalid checkpoint file {path}')
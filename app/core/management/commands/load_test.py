@@ -0,0 +1,76 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.authtoken.models import Token
+
+from core.benchmark import generate_fixtures
+from core.loadtest import MODES, Server, run_load
+
+
+class Command(BaseCommand):
+    """Django command comparing WSGI and ASGI concurrent throughput"""
+    help = 'Load an endpoint of gunicorn (WSGI) and uvicorn (ASGI) servers ' \
+           'with slow concurrent clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES + ('both',),
+                            default='both')
+        parser.add_argument('--path', default='/api/recipe/recipe/')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help='Clients in flight')
+        parser.add_argument('--threads', type=int,
+                            default=settings.ASGI['THREADS'],
+                            help='Worker threads of the server')
+        parser.add_argument('--client-delay', type=float, default=0.05,
+                            help='Seconds a client pauses while sending '
+                                 'the request and before reading the '
+                                 'response')
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument('--attrs', type=int, default=20)
+        parser.add_argument('--output', help='Write the results as JSON')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the generated rows')
+
+    def handle(self, *args, **options):
+        # The servers run in their own processes, so the fixtures are
+        # committed and deleted afterwards instead of rolled back.
+        user = generate_fixtures(
+            users=1, recipes=options['recipes'], attrs=options['attrs']
+        )[0]
+        token = Token.objects.create(user=user)
+        modes = MODES if options['mode'] == 'both' else (options['mode'],)
+
+        results = []
+        try:
+            for mode in modes:
+                with Server(mode, options['threads']) as server:
+                    results.append(run_load(
+                        server.port, options['path'],
+                        headers={'Authorization': f'Token {token.key}'},
+                        requests=options['requests'],
+                        concurrency=options['concurrency'],
+                        client_delay=options['client_delay'],
+                        mode=mode, threads=options['threads']
+                    ))
+        finally:
+            if not options['keep']:
+                get_user_model().objects.filter(pk=user.pk).delete()
+
+        for result in results:
+            self.stdout.write(
+                f'{result["mode"]:<5} {result["throughput"]:>8.1f} req/s  '
+                f'p50 {result["p50_ms"]:>9.2f}ms  '
+                f'p99 {result["p99_ms"]:>9.2f}ms  '
+                f'statuses {result["statuses"]}'
+            )
+        if len(results) == 2 and results[0]['throughput']:
+            self.stdout.write(
+                f'asgi/wsgi throughput '
+                f'{results[1]["throughput"] / results[0]["throughput"]:.2f}x'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
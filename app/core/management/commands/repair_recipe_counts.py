@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.db import iter_chunks
+from core.models import Tag, Ingredient
+
+
+class Command(BaseCommand):
+    """Django command to recompute the recipe counters of attrs"""
+    help = 'Repair recipe_count of tags and ingredients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the stale counters')
+
+    def handle(self, *args, **options):
+        for model in (Tag, Ingredient):
+            stale = model.objects.annotate(
+                actual=model.objects.actual_recipe_count()
+            ).exclude(recipe_count=F('actual')).values_list('pk', flat=True)
+
+            repaired = 0
+            for pks in iter_chunks(stale.iterator(), options['batch_size']):
+                if not options['dry_run']:
+                    model.objects.recount_recipes(pks)
+                repaired += len(pks)
+
+            name = model._meta.verbose_name_plural
+            action = 'stale' if options['dry_run'] else 'repaired'
+            self.stdout.write(f'{repaired} {name} counters {action}')
+        self.stdout.write(self.style.SUCCESS('Recipe counters checked!'))
@@ -0,0 +1,119 @@
+import bisect
+import threading
+from collections import OrderedDict
+
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus exposition model"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        """Record one observation; callers hold the registry lock"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return (upper bound, cumulative count) pairs, +Inf last"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class MetricsRegistry:
+    """Thread safe set of labelled histograms of one process"""
+
+    def __init__(self):
+        self._metrics = OrderedDict()
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text, buckets):
+        """Declare a histogram metric"""
+        self._metrics.setdefault(name, (help_text, buckets, {}))
+
+    def observe(self, labels, values):
+        """Record one observation per metric name for the labels"""
+        labels = tuple(sorted(labels.items()))
+        with self._lock:
+            for name, value in values.items():
+                help_text, buckets, series = self._metrics[name]
+                histogram = series.get(labels)
+                if histogram is None:
+                    histogram = series[labels] = Histogram(buckets)
+                histogram.observe(value)
+
+    def reset(self):
+        """Forget every observation"""
+        with self._lock:
+            for help_text, buckets, series in self._metrics.values():
+                series.clear()
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, (help_text, buckets, series) in self._metrics.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in series.items():
+                    for bound, count in histogram.cumulative():
+                        bucket_labels = labels + (('le', bound),)
+                        lines.append(
+                            f'{name}_bucket{_labels(bucket_labels)} {count}'
+                        )
+                    lines.append(
+                        f'{name}_sum{_labels(labels)} {histogram.sum}'
+                    )
+                    lines.append(
+                        f'{name}_count{_labels(labels)} {histogram.count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+registry = MetricsRegistry()
+registry.describe(
+    'http_request_duration_seconds',
+    'Time spent handling the request.', SECONDS_BUCKETS
+)
+registry.describe(
+    'http_request_db_seconds',
+    'Time spent in SQL queries.', SECONDS_BUCKETS
+)
+registry.describe(
+    'http_request_render_seconds',
+    'Time spent encoding the response body, serializers excluded.',
+    SECONDS_BUCKETS
+)
+registry.describe(
+    'http_request_serialize_seconds',
+    'Time spent serializing the response data in the view.',
+    SECONDS_BUCKETS
+)
+registry.describe(
+    'http_request_queries',
+    'Number of SQL queries.', QUERY_BUCKETS
+)
@@ -0,0 +1,119 @@
+import random
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import connections
+
+from core.metrics import registry
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and their duration"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.serialize_time = 0.0
+        self._render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def start_render(self):
+        self._render_started = time.perf_counter()
+
+    def end_render(self, response):
+        self.render_time += time.perf_counter() - self._render_started
+
+    @contextmanager
+    def serializing(self):
+        """Time the block as serialization of the response data"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.serialize_time += time.perf_counter() - started
+
+
+def serialization_timer(request):
+    """Return a context timing serialization for the request's metrics
+
+    Outside sampled requests nothing is timed.
+    """
+    timer = getattr(request, '_metrics_timer', None)
+    return nullcontext() if timer is None else timer.serializing()
+
+
+class MetricsMiddleware:
+    """Record query counts and timings of sampled requests per endpoint
+
+    Observations go to the histograms of ``core.metrics.registry``, which
+    ``core.views.metrics`` exposes to Prometheus. ``METRICS['SAMPLE_RATE']``
+    is the share of requests measured, 0 turns the middleware off.
+
+    The render time covers the renderer encoding the response body only.
+    DRF serializers build their data inside the view, which reports it
+    through ``serialization_timer``, queries of nested relations included.
+    Streamed bodies are produced after the middleware returns and are
+    measured by neither.
+    """
+    excluded_views = ('metrics',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, 'METRICS', {}).get('SAMPLE_RATE', 1.0)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        timer = request._metrics_timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        labels = self.get_labels(request, response)
+        if labels['view'] not in self.excluded_views:
+            registry.observe(labels, {
+                'http_request_duration_seconds': elapsed,
+                'http_request_db_seconds': timer.db_time,
+                'http_request_render_seconds': timer.render_time,
+                'http_request_serialize_seconds': timer.serialize_time,
+                'http_request_queries': timer.queries,
+            })
+        return response
+
+    def process_template_response(self, request, response):
+        """Time the encoding of DRF and template responses"""
+        timer = getattr(request, '_metrics_timer', None)
+        if timer is not None:
+            timer.start_render()
+            response.add_post_render_callback(timer.end_render)
+        return response
+
+    @staticmethod
+    def get_labels(request, response):
+        """Return the view, action and status class of the request"""
+        match = getattr(request, 'resolver_match', None)
+        method = request.method.lower()
+        if match is None:
+            view, action = 'unresolved', method
+        else:
+            view = match.view_name
+            actions = getattr(match.func, 'actions', None) or {}
+            action = actions.get(method, method)
+        return {
+            'view': view,
+            'action': action,
+            'status': f'{response.status_code // 100}xx',
+        }
@@ -0,0 +1,46 @@
+# Generated by Django 2.1.15 on 2026-10-18 18:23
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Fold tags and ingredients sharing a (user, name) into the oldest"""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, relation in (('Tag', 'tags'),
+                                 ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, relation).through
+        column = f'{model_name.lower()}_id'
+
+        groups = model.objects.values('user', 'name').annotate(
+            keep=Min('id'), count=Count('id')
+        ).filter(count__gt=1)
+        for group in groups:
+            extra = model.objects.filter(
+                user=group['user'], name=group['name']
+            ).exclude(pk=group['keep'])
+            linked = set(through.objects.filter(
+                **{column: group['keep']}
+            ).values_list('recipe_id', flat=True))
+            for row in through.objects.filter(**{f'{column}__in': extra}):
+                if row.recipe_id in linked:
+                    row.delete()
+                else:
+                    setattr(row, column, group['keep'])
+                    row.save()
+                    linked.add(row.recipe_id)
+            extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_names, migrations.RunPython.noop
+        ),
+    ]
@@ -1,6 +1,16 @@
-from django.db import models
+from contextlib import contextmanager
+
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionManager
 from django.conf import settings
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+
+from core.db import delete_rows
 
 
 class UserManager(BaseUserManager):
@@ -60,6 +70,65 @@ class User(AbstractBaseUser, PermissionManager):
     USERNAME_FIELD = 'email'
 
 
+class RecipeAttrManager(models.Manager):
+    """Manager for user owned, uniquely named recipe attributes"""
+
+    def bulk_get_or_create(self, user, names):
+        """Return {name: object} for the names, creating missing ones"""
+        names = list(dict.fromkeys(names))
+        found = {
+            obj.name: obj
+            for obj in self.filter(user=user, name__in=names)
+        }
+        missing = [name for name in names if name not in found]
+        if not missing:
+            return found
+
+        try:
+            with transaction.atomic():
+                created = self.bulk_create(
+                    [self.model(user=user, name=name) for name in missing]
+                )
+        except IntegrityError:
+            # Another request created some of the names concurrently
+            created = [
+                self.get_or_create(user=user, name=name)[0]
+                for name in missing
+            ]
+        if any(obj.pk is None for obj in created):
+            created = self.filter(user=user, name__in=missing)
+        found.update((obj.name, obj) for obj in created)
+        return found
+
+    def adjust_recipe_count(self, pks, delta):
+        """Add delta to the recipe_count of the objects, atomically"""
+        if not delta:
+            return
+        self.filter(pk__in=pks).update(
+            recipe_count=F('recipe_count') + delta,
+            updated_at=timezone.now()
+        )
+
+    def actual_recipe_count(self):
+        """Return a subquery counting the recipes linked to OuterRef pk"""
+        relation = get_recipe_relation(model=self.model)
+        target = relation.target
+        links = relation.through.objects.filter(**{target: OuterRef('pk')})
+        return Coalesce(Subquery(
+            links.order_by().values(target).annotate(
+                count=Count('pk')
+            ).values('count'),
+            output_field=IntegerField()
+        ), 0)
+
+    def recount_recipes(self, pks):
+        """Recompute recipe_count of the objects from their links"""
+        self.filter(pk__in=pks).update(
+            recipe_count=self.actual_recipe_count(),
+            updated_at=timezone.now()
+        )
+
+
 class Tag(models.Model):
     """Tag to be used in the recipe"""
     name = models.CharField(max_length=255)
@@ -67,6 +136,19 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = RecipeAttrManager()
+
+    class Meta:
+        unique_together = ('user', 'name')
+        indexes = [
+            models.Index(fields=['user', '-name', '-id'],
+                         name='core_tag_user_name_idx'),
+            models.Index(fields=['user', '-recipe_count', '-id'],
+                         name='core_tag_user_count_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -79,11 +161,63 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = RecipeAttrManager()
+
+    class Meta:
+        unique_together = ('user', 'name')
+        indexes = [
+            models.Index(fields=['user', '-name', '-id'],
+                         name='core_ingredient_user_name_idx'),
+            models.Index(fields=['user', '-recipe_count', '-id'],
+                         name='core_ingredient_user_count_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Recipe queryset recounting tags and ingredients on delete"""
+
+    def delete(self):
+        """Delete the recipes, recounting their attrs once per model"""
+        with transaction.atomic(using=self.db), self.recounting_attrs():
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def links(self):
+        """Yield (relation, through queryset) of the links of the recipes"""
+        for relation in RECIPE_RELATIONS:
+            yield relation, relation.through.objects.filter(
+                recipe__in=self.values('pk')
+            )
+
+    @contextmanager
+    def recounting_attrs(self):
+        """Delete the m2m links of the recipes, recount their attrs after
+
+        The links go with one DELETE per model before the block and the
+        attrs they pointed at are recounted once per model after it, so
+        the query count of a delete does not grow with the number of
+        recipes or links.
+        """
+        linked = {}
+        for relation, links in self.links():
+            linked[relation.model] = set(
+                links.values_list(relation.column, flat=True)
+            )
+            delete_rows(links)
+        yield
+        for model, pks in linked.items():
+            if pks:
+                model.objects.recount_recipes(pks)
+
+
 class Recipe(models.Model):
     """Recipe to be used in the recipe"""
     user = models.ForeignKey(
@@ -96,6 +230,72 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-title', '-id'],
+                         name='core_recipe_user_title_idx'),
+            models.Index(fields=['user', 'time_minutes'],
+                         name='core_recipe_user_time_idx'),
+            models.Index(fields=['user', 'price'],
+                         name='core_recipe_user_price_idx'),
+            GinIndex(fields=['search_vector'],
+                     name='core_recipe_search_gin_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    def delete(self, using=None, keep_parents=False):
+        """Delete the recipe, recounting its tags and ingredients"""
+        recipes = Recipe.objects.filter(pk=self.pk)
+        with transaction.atomic(using=using), recipes.recounting_attrs():
+            return super().delete(using, keep_parents)
+
+
+class RecipeRelation:
+    """Tags or ingredients of recipes, with the table linking them"""
+
+    def __init__(self, name):
+        self.name = name
+
+    @cached_property
+    def field(self):
+        return Recipe._meta.get_field(self.name)
+
+    @property
+    def model(self):
+        """Model of the tags or ingredients"""
+        return self.field.related_model
+
+    @property
+    def through(self):
+        """Model of the links, one row per recipe and tag or ingredient"""
+        return self.field.remote_field.through
+
+    @cached_property
+    def target(self):
+        """Name of the foreign key of the links to the tag or ingredient"""
+        return self.field.m2m_reverse_field_name()
+
+    @property
+    def column(self):
+        """Column of the links holding the tag or ingredient pk"""
+        return f'{self.target}_id'
+
+
+RECIPE_RELATIONS = (RecipeRelation('ingredients'), RecipeRelation('tags'))
+
+
+def get_recipe_relation(name=None, model=None, through=None):
+    """Return the recipe relation with the name, attr or through model"""
+    for relation in RECIPE_RELATIONS:
+        if name in (None, relation.name) and \
+                model in (None, relation.model) and \
+                through in (None, relation.through):
+            return relation
+    raise LookupError(f'No recipe relation {name or model or through}')
@@ -0,0 +1,74 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipe.cache import get_response_cache
+from user.authentication import get_token_cache
+
+
+def routed_handlers(urlpatterns):
+    """Yield (url name, view class, handler) of every routed request
+
+    Viewset routes map HTTP methods to actions, plain API views handle
+    each method in the method named handler.
+    """
+    for pattern in urlpatterns:
+        if hasattr(pattern, 'url_patterns'):
+            yield from routed_handlers(pattern.url_patterns)
+            continue
+        callback = pattern.callback
+        actions = getattr(callback, 'actions', None)
+        if actions is not None:
+            for action in actions.values():
+                yield pattern.name, callback.cls, action
+            continue
+        view = callback.view_class
+        for method in view.http_method_names:
+            if method not in ('head', 'options') and hasattr(view, method):
+                yield pattern.name, view, method
+
+
+class QueryBudgetMixin:
+    """Assert requests stay within the query budgets of their views
+
+    Views declare ``query_budgets``, the most queries each action (or
+    handler method) may run whatever the size of the data involved.
+    """
+    related_rows = (1, 100)
+
+    def assertQueryBudget(self, view, action, request, add_rows,
+                          per_row=None):
+        """Check a request runs the same, budgeted, queries for 1 and 100
+
+        ``add_rows(n)`` brings the related rows to n before each run and
+        ``request(n)`` performs it, returning the response. ``per_row(sql)``
+        marks the queries a backend is known to run once per row, such as
+        the recipe INSERTs of SQLite; they are left out of the comparison
+        but not of the budget of the first run.
+        """
+        budget = view.query_budgets[action]
+        counts, first = [], None
+        for rows in self.related_rows:
+            add_rows(rows)
+            get_response_cache().clear()
+            get_token_cache().clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = request(rows)
+            self.assertLess(
+                response.status_code, 400, getattr(response, 'data', None)
+            )
+            if first is None:
+                first = len(queries)
+            counts.append(len([
+                query for query in queries
+                if per_row is None or not per_row(query['sql'])
+            ]))
+
+        label = f'{view.__name__}.{action}'
+        self.assertEqual(
+            counts[0], counts[-1],
+            f'{label} runs {counts} queries for {self.related_rows} rows'
+        )
+        self.assertLessEqual(
+            first, budget,
+            f'{label} runs {first} queries, over its budget of {budget}'
+        )
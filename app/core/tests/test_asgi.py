@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import subprocess
+import threading
+import unittest
+
+from django.test import SimpleTestCase
+
+from core.asgi import ThreadPoolWsgiToAsgi
+from core.loadtest import MODES, Server, run_load
+
+
+def request_scope(path, headers=None):
+    """Return the ASGI scope of a GET request of the path"""
+    path, _, query = path.partition('?')
+    return {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'root_path': '',
+        'query_string': query.encode('latin-1'),
+        'headers': [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in (headers or {}).items()
+        ],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+def echo_app(environ, start_response):
+    """WSGI app streaming back the request body and some environ keys"""
+    body = environ['wsgi.input'].read()
+    start_response('201 Created', [('Content-Type', 'application/json'),
+                                   ('X-Echo', 'yes')])
+    yield json.dumps({
+        'path': environ['PATH_INFO'],
+        'query': environ['QUERY_STRING'],
+        'type': environ.get('CONTENT_TYPE'),
+        'accept': environ.get('HTTP_ACCEPT'),
+    }).encode()
+    yield body
+
+
+def run(handler, *requests):
+    """Drive concurrent ASGI requests, returning their sent messages
+
+    Each request is a (scope, body chunks) pair.
+    """
+    async def one(scope, chunks):
+        messages = list(chunks)
+        sent = []
+
+        async def receive():
+            body = messages.pop(0)
+            return {'type': 'http.request', 'body': body,
+                    'more_body': bool(messages)}
+
+        async def send(message):
+            sent.append(message)
+
+        await handler(scope, receive, send)
+        return sent
+
+    async def all_requests():
+        return await asyncio.gather(*(
+            one(scope, chunks) for scope, chunks in requests
+        ))
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(all_requests())
+    finally:
+        loop.close()
+
+
+class ThreadPoolWsgiToAsgiTests(SimpleTestCase):
+    """Test serving a WSGI application over ASGI"""
+
+    def setUp(self):
+        self.handler = ThreadPoolWsgiToAsgi(echo_app, max_workers=2)
+
+    def tearDown(self):
+        self.handler.executor.shutdown()
+
+    def test_request_and_streamed_response(self):
+        """Test the body is received and the response streamed back"""
+        scope = request_scope('/echo/?q=1', {'Content-Type': 'text/plain'})
+        scope['method'] = 'POST'
+
+        sent, = run(self.handler, (scope, [b'hello ', b'world']))
+
+        self.assertEqual(sent[0]['type'], 'http.response.start')
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'x-echo', b'yes'), sent[0]['headers'])
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        meta = json.loads(body[:body.index(b'}') + 1])
+        self.assertEqual(meta['path'], '/echo/')
+        self.assertEqual(meta['query'], 'q=1')
+        self.assertTrue(body.endswith(b'hello world'))
+        self.assertFalse(sent[-1].get('more_body', False))
+        self.assertTrue(all(m['more_body'] for m in sent[1:-1]))
+
+    def test_requests_run_concurrently(self):
+        """Test requests are not serialized on a single thread"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def app(environ, start_response):
+            # Both requests must be in the app at once to pass the barrier
+            barrier.wait()
+            start_response('200 OK', [])
+            return [threading.current_thread().name.encode()]
+
+        handler = ThreadPoolWsgiToAsgi(app, max_workers=2)
+        self.addCleanup(handler.executor.shutdown)
+
+        responses = run(handler, *[(request_scope('/'), [b''])] * 2)
+
+        self.assertEqual([sent[0]['status'] for sent in responses],
+                         [200, 200])
+        threads = {b''.join(m.get('body', b'') for m in sent[1:])
+                   for sent in responses}
+        self.assertEqual(len(threads), 2)
+
+
+@unittest.skipUnless(os.environ.get('LOAD_TEST_SERVERS'),
+                     'set LOAD_TEST_SERVERS=1 to start real servers')
+class LoadTestServerTests(SimpleTestCase):
+    """Test loading real WSGI and ASGI servers of the project"""
+
+    def test_servers(self):
+        """Test both servers answer every slow client over a socket"""
+        for mode in MODES:
+            with Server(mode, 2, log=subprocess.DEVNULL) as server:
+                result = run_load(
+                    server.port, '/api/recipe/tags/', requests=6,
+                    concurrency=3, client_delay=0.01, mode=mode
+                )
+            self.assertIsNotNone(server.process.poll())
+            self.assertEqual(result['mode'], mode)
+            self.assertEqual(result['requests'], 6)
+            # Anonymous clients are turned away without touching the db
+            self.assertEqual(result['statuses'], [401])
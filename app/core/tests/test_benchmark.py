@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.benchmark import compare, generate_fixtures, percentile
+from core.models import Tag, Recipe
+
+
+class BenchmarkTests(TestCase):
+    """Test the benchmark fixtures, statistics and command"""
+
+    def test_generate_fixtures(self):
+        """Test fixtures are generated at the requested scale"""
+        users = generate_fixtures(users=2, recipes=5, attrs=4, links=2)
+
+        self.assertEqual(len(users), 2)
+        self.assertEqual(Recipe.objects.filter(user=users[1]).count(), 5)
+        self.assertEqual(Tag.objects.filter(user=users[0]).count(), 4)
+        recipe = Recipe.objects.filter(user=users[0]).first()
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(sum(Tag.objects.filter(
+            user=users[0]
+        ).values_list('recipe_count', flat=True)), 10)
+
+    def test_percentile(self):
+        """Test percentiles interpolate between ranks"""
+        self.assertEqual(percentile([3, 1, 2, 4], 50), 2.5)
+        self.assertEqual(percentile([5], 99), 5)
+
+    def test_compare(self):
+        """Test slower, chattier and failing scenarios are flagged"""
+        baseline = {'list': {'p50_ms': 10, 'queries': 3, 'statuses': [200]}}
+
+        self.assertEqual(compare(
+            {'list': {'p50_ms': 11, 'queries': 3, 'statuses': [200]}},
+            baseline
+        ), [])
+        self.assertEqual(len(compare(
+            {'list': {'p50_ms': 20, 'queries': 4, 'statuses': [500]}},
+            baseline
+        )), 3)
+
+    def test_benchmark_command(self):
+        """Test the command writes results and compares to a baseline"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command('benchmark_api', recipes=5, attrs=3, requests=2,
+                         output=path, stdout=StringIO())
+            with open(path) as file:
+                report = json.load(file)
+
+            for name, result in report['results'].items():
+                self.assertTrue(
+                    all(status < 400 for status in result['statuses']), name
+                )
+            self.assertIn('recipe list', report['results'])
+            self.assertFalse(Recipe.objects.exists())
+
+            for result in report['results'].values():
+                result['queries'] = 0
+            with open(path, 'w') as file:
+                json.dump(report, file)
+            with self.assertRaises(CommandError):
+                call_command('benchmark_api', recipes=5, attrs=3,
+                             requests=2, compare=path, threshold=100,
+                             stdout=StringIO())
@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from core.cache import DjangoCache, LRUCache
+
+
+class LRUCacheTests(TestCase):
+
+    def test_get_set(self):
+        """Test cached values are returned until deleted"""
+        cache = LRUCache()
+        cache.set('key', 'value')
+
+        self.assertEqual(cache.get('key'), 'value')
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+
+    def test_evicts_least_recently_used(self):
+        """Test the cache stays within its size bound"""
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    @patch('core.cache.time.monotonic')
+    def test_entries_expire(self, monotonic):
+        """Test entries are dropped after their timeout"""
+        monotonic.return_value = 100
+        cache = LRUCache(timeout=10)
+        cache.set('key', 'value')
+        cache.set('forever', 'value', timeout=None)
+
+        monotonic.return_value = 111
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get('forever'), 'value')
+
+    def test_incr(self):
+        """Test incrementing requires an existing number"""
+        cache = LRUCache()
+        with self.assertRaises(ValueError):
+            cache.incr('counter')
+
+        cache.set('counter', 1)
+        self.assertEqual(cache.incr('counter'), 2)
+
+
+class DjangoCacheTests(TestCase):
+
+    def setUp(self):
+        DjangoCache().clear()
+
+    def test_instances_share_entries(self):
+        """Test adapters of one alias see each other's writes, as workers"""
+        worker, other_worker = DjangoCache(), DjangoCache()
+        worker.set('version', 1)
+
+        self.assertEqual(other_worker.incr('version'), 2)
+        self.assertEqual(worker.get('version'), 2)
+        worker.delete('version')
+        self.assertIsNone(other_worker.get('version'))
+
+    def test_incr(self):
+        """Test incrementing requires an existing number"""
+        with self.assertRaises(ValueError):
+            DjangoCache().incr('counter')
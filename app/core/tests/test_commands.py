@@ -1,9 +1,16 @@
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.models import Recipe
+
 
 class CommandTest(TestCase):
     def test_wait_for_db_ready(self):
@@ -20,3 +27,56 @@ class CommandTest(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+    def test_check_query_plans(self):
+        """Test the list queries are served by their indexes"""
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+
+        self.assertIn('Query plans use indexes', out.getvalue())
+
+    def test_check_query_plans_regression(self):
+        """Test a list query needing a sort is reported"""
+        queryset = Recipe.objects.filter(user_id=0).order_by('link')[:50]
+        with patch(
+            'core.management.commands.check_query_plans.list_queries',
+            return_value=[('recipe by link', queryset)]
+        ):
+            with self.assertRaises(CommandError):
+                call_command('check_query_plans', stdout=StringIO())
+
+    def test_import_recipes(self):
+        """Test importing a dump resumes from its checkpoint"""
+        user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recipes.csv')
+            checkpoint = os.path.join(directory, 'checkpoint')
+            with open(path, 'w') as file:
+                file.write('title,tags,time_minutes,price\n'
+                           'Soup,Vegan,20,3.50\n'
+                           'Tea,,5,0.50\n')
+            with open(checkpoint, 'w') as file:
+                file.write('1')
+
+            out = StringIO()
+            call_command('import_recipes', path, user='test@gmail.com',
+                         checkpoint=checkpoint, stdout=out)
+
+            self.assertFalse(os.path.exists(checkpoint))
+        self.assertIn('Imported 1 recipes', out.getvalue())
+        self.assertIn('rows/sec', out.getvalue())
+        self.assertEqual(
+            list(Recipe.objects.filter(user=user).values_list(
+                'title', flat=True
+            )),
+            ['Tea']
+        )
+
+    def test_import_recipes_unknown_user(self):
+        """Test importing for a missing user fails"""
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', 'recipes.csv',
+                         user='nobody@gmail.com', stdout=StringIO())
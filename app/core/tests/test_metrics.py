@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.metrics import Histogram, MetricsRegistry, registry
+
+METRICS_URL = reverse('metrics')
+TAGS_URL = reverse('recipe:tag-list')
+LABELS = '{action="list",status="2xx",view="recipe:tag-list"}'
+
+
+class MetricsRegistryTests(TestCase):
+    """Test histograms and their Prometheus rendering"""
+
+    def test_histogram_buckets(self):
+        """Test observations land in cumulative le buckets"""
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 9):
+            histogram.observe(value)
+
+        self.assertEqual(
+            histogram.cumulative(), [(1, 2), (5, 3), ('+Inf', 4)]
+        )
+        self.assertEqual(histogram.sum, 13)
+
+    def test_render(self):
+        """Test the text exposition format"""
+        metrics = MetricsRegistry()
+        metrics.describe('queries', 'Number of queries.', (1,))
+        metrics.observe({'view': 'a"b'}, {'queries': 2})
+
+        self.assertEqual(metrics.render(), '\n'.join([
+            '# HELP queries Number of queries.',
+            '# TYPE queries histogram',
+            'queries_bucket{view="a\\"b",le="1"} 0',
+            'queries_bucket{view="a\\"b",le="+Inf"} 1',
+            'queries_sum{view="a\\"b"} 2',
+            'queries_count{view="a\\"b"} 1',
+        ]) + '\n')
+
+
+@override_settings(METRICS={'SAMPLE_RATE': 1.0, 'ALLOWED_IPS': ['127.0.0.1']})
+class MetricsMiddlewareTests(TestCase):
+    """Test requests are measured per endpoint"""
+
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(user)
+
+    def test_request_recorded(self):
+        """Test a list request is recorded under its view and action"""
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        body = res.content.decode()
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(f'http_request_queries_count{LABELS} 1', body)
+        self.assertIn(f'http_request_render_seconds_count{LABELS} 1', body)
+        self.assertIn(f'http_request_serialize_seconds_count{LABELS} 1', body)
+        self.assertNotIn('view="metrics"', body)
+
+    def test_queries_counted(self):
+        """Test the recorded query count matches the executed queries"""
+        with self.assertNumQueries(2):
+            self.client.get(TAGS_URL)
+
+        body = self.client.get(METRICS_URL).content.decode()
+        self.assertIn(f'http_request_queries_sum{LABELS} 2', body)
+
+    @override_settings(METRICS={'SAMPLE_RATE': 0})
+    def test_sampling_disabled(self):
+        """Test no request is recorded with a zero sample rate"""
+        self.client.get(TAGS_URL)
+
+        body = self.client.get(METRICS_URL).content.decode()
+        self.assertNotIn('recipe:tag-list', body)
+
+    def test_serialization_timed(self):
+        """Test the serializer time is a share of the request duration"""
+        self.client.get(TAGS_URL)
+
+        body = self.client.get(METRICS_URL).content.decode()
+        sums = {
+            line.split('{')[0]: float(line.split()[-1])
+            for line in body.splitlines() if LABELS in line and
+            line.split('{')[0].endswith('_seconds_sum')
+        }
+        serialize = sums['http_request_serialize_seconds_sum']
+        self.assertGreater(serialize, 0)
+        self.assertLess(serialize, sums['http_request_duration_seconds_sum'])
+
+    @override_settings(METRICS={'SAMPLE_RATE': 1.0, 'ALLOWED_IPS': []})
+    def test_metrics_access(self):
+        """Test only allowed addresses and staff users read the metrics"""
+        res = APIClient().get(METRICS_URL)
+        self.assertEqual(res.status_code, 403)
+
+        res = APIClient().get(METRICS_URL, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(res.status_code, 403)
+
+        staff = get_user_model().objects.create_superuser(
+            'admin@gmail.com',
+            'testtest'
+        )
+        client = APIClient()
+        client.force_login(staff)
+        self.assertEqual(client.get(METRICS_URL).status_code, 200)
+
+        with override_settings(METRICS={'ALLOWED_IPS': ['10.0.0.9']}):
+            res = APIClient().get(METRICS_URL, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(res.status_code, 200)
+
+
+class MetricsSettingsTests(TestCase):
+    """Test the metrics settings defaults"""
+
+    def test_no_address_allowed_by_default(self):
+        """Test only staff users read the metrics unless IPs are listed"""
+        self.assertEqual(settings.METRICS['ALLOWED_IPS'], [])
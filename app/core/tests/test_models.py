@@ -1,3 +1,6 @@
+from unittest.mock import patch
+
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from core import models
@@ -81,3 +84,31 @@ class ModelTests(TestCase):
         )
 
         self.assertEqual(str(recipe), recipe.title)
+
+    def test_bulk_get_or_create(self):
+        """Test resolving names creates only the missing attributes"""
+        user = sample_user()
+        salt = models.Ingredient.objects.create(user=user, name='Salt')
+
+        found = models.Ingredient.objects.bulk_get_or_create(
+            user, ['Salt', 'Pepper']
+        )
+
+        self.assertEqual(found['Salt'], salt)
+        self.assertIsNotNone(found['Pepper'].pk)
+        self.assertEqual(models.Ingredient.objects.count(), 2)
+
+    def test_bulk_get_or_create_concurrent_insert(self):
+        """Test names created concurrently are looked up instead"""
+        user = sample_user()
+        manager = models.Tag.objects
+
+        def concurrent_bulk_create(objs):
+            models.Tag.objects.create(user=user, name='Vegan')
+            raise IntegrityError
+
+        with patch.object(manager, 'bulk_create', concurrent_bulk_create):
+            found = manager.bulk_get_or_create(user, ['Vegan', 'Dessert'])
+
+        self.assertEqual(set(found), {'Vegan', 'Dessert'})
+        self.assertEqual(models.Tag.objects.count(), 2)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+
+from core.metrics import registry
+
+
+def metrics(request):
+    """Expose the request metrics of this process to Prometheus
+
+    Only clients of ``METRICS['ALLOWED_IPS']`` and staff users may read
+    them.
+    """
+    allowed = getattr(settings, 'METRICS', {}).get('ALLOWED_IPS', ())
+    if request.META.get('REMOTE_ADDR') not in allowed and \
+            not request.user.is_staff:
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,46 @@
+from core.db import bulk_create_with_pks
+from core.models import RECIPE_RELATIONS, Recipe
+from recipe.search import update_search_vectors
+
+
+def insert_recipes(recipes, relations):
+    """Insert unsaved recipes with their links, return them with pks
+
+    ``relations`` holds a ``{relation name: attr pks}`` dict per recipe.
+    The recipes, then the links of each relation, are inserted in bulk,
+    the linked attrs recounted and the search vectors computed with a
+    fixed number of queries. Call it inside a transaction.
+    """
+    recipes = bulk_create_with_pks(Recipe, recipes)
+    add_links(zip(recipes, relations))
+    recount_links(relations)
+    update_search_vectors(
+        Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes])
+    )
+    return recipes
+
+
+def add_links(pairs):
+    """Insert the through rows of (recipe, relation dict) pairs"""
+    pairs = list(pairs)
+    for relation in RECIPE_RELATIONS:
+        rows = [
+            relation.through(recipe_id=recipe.pk, **{relation.column: pk})
+            for recipe, relations in pairs
+            for pk in dict.fromkeys(relations.get(relation.name, ()))
+        ]
+        if rows:
+            relation.through.objects.bulk_create(rows)
+
+
+def recount_links(relations):
+    """Recompute recipe_count of the attrs named in relation dicts
+
+    Bulk writes insert and delete through rows directly, so no
+    m2m_changed signal maintains the counters for them.
+    """
+    for relation in RECIPE_RELATIONS:
+        pks = {pk for item in relations
+               for pk in item.get(relation.name, ())}
+        if pks:
+            relation.model.objects.recount_recipes(pks)
@@ -0,0 +1,73 @@
+import functools
+import hashlib
+import time
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.cache import get_cache
+
+
+CACHE_SETTING = 'RECIPE_CACHE'
+
+
+def get_response_cache():
+    """Return the backend holding cached recipe API responses"""
+    return get_cache(CACHE_SETTING)
+
+
+def _version_key(user_id):
+    return f'recipe:version:{user_id}'
+
+
+def _new_version():
+    # Seeded from the clock so a version that was evicted from the cache
+    # never comes back with a value older entries were stored under.
+    return time.time_ns()
+
+
+def get_version(user_id):
+    """Return the current cache version of the user's recipe data"""
+    cache = get_response_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        cache.set(key, version, timeout=None)
+    return version
+
+
+def bump_version(user_id):
+    """Invalidate every cached response of the user"""
+    cache = get_response_cache()
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), timeout=None)
+
+
+def response_key(request, version):
+    """Return the cache key of a response for the request"""
+    url = hashlib.md5(
+        request.build_absolute_uri().encode('utf-8')
+    ).hexdigest()
+    return f'recipe:response:{request.user.pk}:{version}:{url}'
+
+
+def cache_response(method):
+    """Serve repeated reads of a viewset action from the per-user cache"""
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        cache = get_response_cache()
+        key = response_key(request, get_version(request.user.pk))
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK and \
+                not response.streaming:
+            cache.set(key, response.data)
+        return response
+    return wrapper
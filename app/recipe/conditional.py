@@ -0,0 +1,67 @@
+import functools
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+
+def get_validators(view, request, **kwargs):
+    """Return the (etag, last_modified) pair of the requested resource
+
+    Both come from one aggregate over the rows the action would serialize
+    so a revalidation never has to build the response body. Deleting a row
+    leaves the newest ``updated_at`` of a collection as it was, so only
+    detail responses get a last modified time; collections rely on the
+    ETag, which also covers the row count.
+    """
+    queryset = view.filter_queryset(view.get_queryset())
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    detail = lookup_url_kwarg in kwargs
+    if detail:
+        queryset = queryset.filter(
+            **{view.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+
+    state = queryset.order_by().aggregate(
+        count=Count('pk'),
+        last_modified=Max('updated_at')
+    )
+    if state['last_modified'] is None:
+        return None, None
+
+    renderer = getattr(request, 'accepted_renderer', None)
+    fingerprint = ':'.join(str(part) for part in (
+        request.user.pk,
+        request.get_full_path(),
+        getattr(renderer, 'format', ''),
+        state['count'],
+        state['last_modified'].isoformat(),
+    ))
+    etag = quote_etag(hashlib.md5(fingerprint.encode('utf-8')).hexdigest())
+    if not detail:
+        return etag, None
+    return etag, int(state['last_modified'].timestamp())
+
+
+def conditional_response(method):
+    """Answer conditional GETs of a viewset action with 304 responses"""
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        etag, last_modified = get_validators(self, request, **kwargs)
+        if etag is None:
+            return method(self, request, *args, **kwargs)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = method(self, request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+    return wrapper
@@ -0,0 +1,76 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.utils import html
+
+
+class OwnedPrimaryKeysField(serializers.Field):
+    """List of related pks resolved with one query scoped to the user
+
+    Replaces ``PrimaryKeyRelatedField(many=True)``, which issues one
+    ``get()`` per submitted pk and accepts objects of other users.
+    """
+
+    default_error_messages = {
+        'not_a_list': _(
+            'Expected a list of items but got type "{input_type}".'
+        ),
+        'incorrect_type': _(
+            'Incorrect type. Expected pk value, received {data_type}.'
+        ),
+        'does_not_exist': _(
+            'Invalid pk "{pk_value}" - object does not exist.'
+        ),
+    }
+
+    def __init__(self, queryset, **kwargs):
+        self.queryset = queryset
+        super().__init__(**kwargs)
+
+    def get_value(self, dictionary):
+        """Read the list from JSON or repeated form fields"""
+        if html.is_html_input(dictionary):
+            if self.field_name not in dictionary:
+                if getattr(self.root, 'partial', False):
+                    return empty
+            return dictionary.getlist(self.field_name)
+        return dictionary.get(self.field_name, empty)
+
+    def get_queryset(self):
+        """Return the related objects the requesting user owns"""
+        request = self.context.get('request')
+        if request is None:
+            return self.queryset.none()
+        return self.queryset.filter(user=request.user)
+
+    def to_internal_value(self, data):
+        """Return the related objects of the submitted pks"""
+        if isinstance(data, (str, dict)) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+
+        pks = []
+        for item in data:
+            if isinstance(item, bool):
+                self.fail('incorrect_type', data_type=type(item).__name__)
+            try:
+                pks.append(int(item))
+            except (TypeError, ValueError):
+                self.fail('incorrect_type', data_type=type(item).__name__)
+        pks = list(dict.fromkeys(pks))
+        if not pks:
+            return []
+
+        found = {obj.pk: obj for obj in self.get_queryset().filter(
+            pk__in=pks
+        )}
+        missing = [pk for pk in pks if pk not in found]
+        if missing:
+            raise serializers.ValidationError([
+                self.error_messages['does_not_exist'].format(pk_value=pk)
+                for pk in missing
+            ], code='does_not_exist')
+        return [found[pk] for pk in pks]
+
+    def to_representation(self, value):
+        """Return the pks of the related manager, using any prefetch"""
+        return [obj.pk for obj in value.all()]
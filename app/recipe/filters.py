@@ -0,0 +1,121 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Exists, OuterRef
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from core.models import get_recipe_relation
+from recipe.search import search_recipes
+
+
+def parse_ids(params, name):
+    """Return the comma separated ids of a query parameter"""
+    value = params.get(name)
+    if not value:
+        return []
+    try:
+        return list(dict.fromkeys(int(pk) for pk in value.split(',')))
+    except ValueError:
+        raise ValidationError({name: ['Enter a comma separated list of ids.']})
+
+
+def parse_names(params, name, choices):
+    """Return the comma separated names of a query parameter"""
+    value = params.get(name)
+    if not value:
+        return []
+    names = list(dict.fromkeys(
+        part.strip() for part in value.split(',') if part.strip()
+    ))
+    unknown = ', '.join(part for part in names if part not in choices)
+    if unknown:
+        raise ValidationError({name: [f'Unknown fields: {unknown}.']})
+    return names
+
+
+def parse_number(params, name, parser, message):
+    """Return a numeric query parameter, None when absent"""
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return parser(value)
+    except (ValueError, InvalidOperation):
+        raise ValidationError({name: [message]})
+
+
+class RecipeFilterBackend(BaseFilterBackend):
+    """Filter recipes by tags, ingredients, cooking time and price
+
+    Relation filters are ``pk IN (subquery)`` conditions on the through
+    tables, so no join multiplies the rows and no DISTINCT is needed.
+    """
+    relations = ('tags', 'ingredients')
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        match = params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': ['Expected "any" or "all".']})
+
+        for relation in self.relations:
+            ids = parse_ids(params, relation)
+            if ids:
+                queryset = queryset.filter(
+                    pk__in=self.matching_recipes(relation, ids, match)
+                )
+
+        max_time = parse_number(
+            params, 'max_time', int, 'Enter a whole number.'
+        )
+        if max_time is not None:
+            queryset = queryset.filter(time_minutes__lte=max_time)
+
+        price_lt = parse_number(
+            params, 'price_lt', Decimal, 'Enter a number.'
+        )
+        if price_lt is not None:
+            queryset = queryset.filter(price__lt=price_lt)
+
+        return queryset
+
+    @staticmethod
+    def matching_recipes(relation, ids, match):
+        """Return a subquery of recipe ids linked to any or all ids"""
+        relation = get_recipe_relation(relation)
+        column = relation.column
+        links = relation.through.objects.filter(**{f'{column}__in': ids})
+        if match == 'all':
+            links = links.values('recipe_id').annotate(
+                matched=Count(column)
+            ).filter(matched=len(ids))
+        return links.values('recipe_id')
+
+
+class AssignedOnlyFilterBackend(BaseFilterBackend):
+    """Limit tags or ingredients to those used by at least one recipe"""
+
+    def filter_queryset(self, request, queryset, view):
+        if request.query_params.get('assigned_only') not in ('1', 'true'):
+            return queryset
+        return self.assigned(queryset, view.recipe_relation)
+
+    @staticmethod
+    def assigned(queryset, relation):
+        """Keep the objects linked to a recipe through the relation"""
+        relation = get_recipe_relation(relation)
+        links = relation.through.objects.filter(
+            **{relation.column: OuterRef('pk')}
+        )
+        return queryset.annotate(assigned=Exists(links)).filter(assigned=True)
+
+
+class RecipeSearchFilterBackend(BaseFilterBackend):
+    """Rank recipes matching ?search= in titles, tags and ingredients"""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+        return search_recipes(queryset, term).order_by(*view.get_ordering())
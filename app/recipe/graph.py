@@ -0,0 +1,304 @@
+import threading
+import time
+
+import numpy as np
+from django.db import transaction
+
+from core.cache import get_cache
+from core.models import RECIPE_RELATIONS, Recipe
+from recipe.cache import get_response_cache
+
+
+CACHE_SETTING = 'RECIPE_GRAPH_CACHE'
+RELATIONS = tuple(relation.name for relation in RECIPE_RELATIONS)
+METRICS = ('jaccard', 'cosine')
+
+
+def get_graph_cache():
+    """Return the in-process backend holding the users' graphs"""
+    return get_cache(CACHE_SETTING)
+
+
+def _graph_key(user_id):
+    return f'recipe:graph:{user_id}'
+
+
+def _version_key(user_id):
+    return f'recipe:graph:version:{user_id}'
+
+
+def _new_version():
+    # Seeded from the clock so an evicted version never comes back with
+    # a value a stale graph was built at.
+    return time.time_ns()
+
+
+def get_graph_version(user_id):
+    """Return the shared version of the user's recipe relations"""
+    cache = get_response_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        cache.set(key, version, timeout=None)
+    return version
+
+
+def bump_graph_version(user_id):
+    """Record a change of the user's recipe relations, return the version"""
+    cache = get_response_cache()
+    key = _version_key(user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _new_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+class RecipeGraph:
+    """Similarity index of the recipes of one user
+
+    Every recipe is a row holding the set of its ingredient and tag
+    features. ``postings`` maps each feature to the NumPy array of rows
+    that have it, so the features shared with one recipe are counted for
+    all rows at once with ``bincount`` over the query's postings, and
+    ``sizes`` holds the per relation feature counts of every row.
+    Removed recipes leave dead rows that no posting points at.
+    """
+
+    def __init__(self, version, ids, features):
+        self.version = version
+        self.ids = np.array(ids, dtype=np.int64)
+        self.rows = {pk: row for row, pk in enumerate(ids)}
+        self.features = features
+        self.sizes = {
+            relation: np.array([
+                sum(1 for feature in row if feature[0] == relation)
+                for row in features
+            ], dtype=np.int32)
+            for relation in RELATIONS
+        }
+        self.postings = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, user_id, version):
+        """Load the graph of the user's recipes in one query per table"""
+        ids = list(Recipe.objects.filter(user_id=user_id).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
+        rows = {pk: row for row, pk in enumerate(ids)}
+        features = [set() for pk in ids]
+        members = {}
+        for relation in RECIPE_RELATIONS:
+            links = relation.through.objects.filter(
+                recipe__user_id=user_id
+            ).values_list('recipe_id', relation.column)
+            for recipe_id, target_id in links.iterator():
+                row = rows[recipe_id]
+                feature = (relation.name, target_id)
+                features[row].add(feature)
+                members.setdefault(feature, []).append(row)
+
+        graph = cls(version, ids, features)
+        graph.postings = {
+            feature: np.array(linked, dtype=np.int64)
+            for feature, linked in members.items()
+        }
+        return graph
+
+    def add_recipe(self, recipe_id):
+        """Add a recipe without features"""
+        if recipe_id in self.rows:
+            return
+        self.rows[recipe_id] = len(self.ids)
+        self.ids = np.append(self.ids, recipe_id)
+        for relation in RELATIONS:
+            self.sizes[relation] = np.append(self.sizes[relation], 0)
+        self.features.append(set())
+
+    def remove_recipe(self, recipe_id):
+        """Remove a recipe and its features"""
+        row = self.rows.pop(recipe_id, None)
+        if row is None:
+            return
+        for feature in self.features[row]:
+            self._unlink(row, feature)
+        self.features[row] = set()
+        for relation in RELATIONS:
+            self.sizes[relation][row] = 0
+
+    def link(self, recipe_id, feature):
+        """Give a recipe a feature"""
+        row = self.rows.get(recipe_id)
+        if row is None or feature in self.features[row]:
+            return
+        self.features[row].add(feature)
+        self.sizes[feature[0]][row] += 1
+        postings = self.postings.get(feature)
+        self.postings[feature] = np.append(
+            postings if postings is not None else [], row
+        ).astype(np.int64)
+
+    def unlink(self, recipe_id, feature):
+        """Take a feature away from a recipe"""
+        row = self.rows.get(recipe_id)
+        if row is None or feature not in self.features[row]:
+            return
+        self.features[row].discard(feature)
+        self.sizes[feature[0]][row] -= 1
+        self._unlink(row, feature)
+
+    def unlink_relation(self, recipe_id, relation):
+        """Take every feature of one relation away from a recipe"""
+        row = self.rows.get(recipe_id)
+        if row is None:
+            return
+        for feature in list(self.features[row]):
+            if feature[0] == relation:
+                self.unlink(recipe_id, feature)
+
+    def remove_feature(self, feature):
+        """Take a feature away from every recipe having it"""
+        rows = self.postings.pop(feature, None)
+        if rows is not None:
+            for row in rows.tolist():
+                self.features[row].discard(feature)
+            np.subtract.at(self.sizes[feature[0]], rows, 1)
+
+    def _unlink(self, row, feature):
+        postings = self.postings[feature]
+        postings = postings[postings != row]
+        if len(postings):
+            self.postings[feature] = postings
+        else:
+            del self.postings[feature]
+
+    def similar(self, recipe_id, limit=10, metric='jaccard'):
+        """Return (recipe id, score) of the recipes most like one recipe
+
+        Only recipes sharing at least one feature are ranked. Equal scores
+        rank the newest recipe first.
+        """
+        with self.lock:
+            return self._similar(recipe_id, limit, metric)
+
+    def _similar(self, recipe_id, limit, metric):
+        row = self.rows.get(recipe_id)
+        if row is None or not self.features[row]:
+            return []
+        hits = np.concatenate([
+            self.postings[feature] for feature in self.features[row]
+        ])
+        shared = np.bincount(hits, minlength=len(self.ids))
+        shared[row] = 0
+        candidates = np.flatnonzero(shared)
+        if not len(candidates):
+            return []
+
+        shared = shared[candidates]
+        size = len(self.features[row])
+        sizes = sum(self.sizes[relation][candidates] for relation in RELATIONS)
+        if metric == 'cosine':
+            scores = shared / np.sqrt(size * sizes)
+        else:
+            scores = shared / (size + sizes - shared)
+
+        if len(candidates) > limit:
+            # Keep every candidate tied with the last one for the sort
+            cutoff = -np.partition(-scores, limit - 1)[limit - 1]
+            kept = scores >= cutoff
+            candidates, scores = candidates[kept], scores[kept]
+        ids = self.ids[candidates]
+        order = np.lexsort((-ids, -scores))[:limit]
+        return list(zip(ids[order].tolist(), scores[order].tolist()))
+
+    def cookable(self, ingredient_ids, missing=0, limit=50):
+        """Return (recipe id, missing ingredient ids) of covered recipes
+
+        A recipe is covered when it uses a pantry ingredient and lacks at
+        most ``missing`` of its ingredients. Only the postings of the
+        pantry are read, so the cost follows the recipes using them and
+        not the user's recipe count. Fewest missing rank first, then the
+        newest recipe.
+        """
+        pantry = {('ingredients', pk) for pk in ingredient_ids}
+        with self.lock:
+            postings = [self.postings[feature] for feature in pantry
+                        if feature in self.postings]
+            if not postings:
+                return []
+            rows, have = np.unique(
+                np.concatenate(postings), return_counts=True
+            )
+            lacking = self.sizes['ingredients'][rows] - have
+            kept = lacking <= missing
+            rows, lacking = rows[kept], lacking[kept]
+            order = np.lexsort((-self.ids[rows], lacking))[:limit]
+            return [
+                (int(self.ids[row]), sorted(
+                    pk for relation, pk in self.features[row]
+                    if relation == 'ingredients'
+                    and (relation, pk) not in pantry
+                ))
+                for row in rows[order].tolist()
+            ]
+
+
+def get_graph(user_id):
+    """Return the graph of the user, rebuilt when it is out of date
+
+    A graph rebuilt inside a transaction may hold rows that are rolled
+    back later, so it is only cached when built outside of one.
+    """
+    graphs = get_graph_cache()
+    key = _graph_key(user_id)
+    version = get_graph_version(user_id)
+    graph = graphs.get(key)
+    if graph is None or graph.version != version:
+        graph = RecipeGraph.build(user_id, version)
+        if not transaction.get_connection().in_atomic_block:
+            graphs.set(key, graph)
+    return graph
+
+
+def update_graph(user_id, change):
+    """Apply ``change(graph)`` to the cached graph of the user on commit
+
+    Changes made inside a transaction wait for it to commit, so a rolled
+    back one never reaches the graph. The shared version is bumped first.
+    A graph that missed a change made by another process no longer sits
+    one version behind it and is dropped instead, to be rebuilt by the
+    next query.
+    """
+    transaction.on_commit(lambda: _apply_change(user_id, change))
+
+
+def _apply_change(user_id, change):
+    version = bump_graph_version(user_id)
+    graphs = get_graph_cache()
+    key = _graph_key(user_id)
+    graph = graphs.get(key)
+    if graph is None:
+        return
+    with graph.lock:
+        if graph.version + 1 == version:
+            change(graph)
+            graph.version = version
+            return
+    graphs.delete(key)
+
+
+def invalidate_graph(user_id):
+    """Drop the graph of the user after writes that send no signals
+
+    Inside a transaction the graph is dropped when it commits, so no
+    other process rebuilds it from the rows it is about to replace.
+    """
+    transaction.on_commit(lambda: _drop_graph(user_id))
+
+
+def _drop_graph(user_id):
+    bump_graph_version(user_id)
+    get_graph_cache().delete(_graph_key(user_id))
@@ -0,0 +1,190 @@
+import csv
+import json
+import time
+
+from django.db import transaction
+from rest_framework import serializers
+
+from core.db import iter_chunks
+from core.models import RECIPE_RELATIONS, Recipe
+from recipe.bulk import insert_recipes
+from recipe.cache import bump_version
+from recipe.graph import invalidate_graph
+from recipe.renderers import CSVRenderer
+
+
+FORMATS = ('ndjson', 'csv')
+
+
+class RecipeImportSerializer(serializers.ModelSerializer):
+    """Validate one imported recipe, tags and ingredients given by name"""
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=255), required=False
+    )
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255), required=False
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ('title', 'ingredients', 'tags',
+                  'time_minutes', 'price', 'link')
+
+
+def format_of(filename, default='ndjson'):
+    """Guess the import format from a file name"""
+    extension = filename.rsplit('.', 1)[-1].lower()
+    return extension if extension in FORMATS else default
+
+
+def decode_lines(lines, errors):
+    """Yield the text of UTF-8 byte lines, dropping a byte order mark
+
+    A line that is not UTF-8 is yielded with replacement characters and
+    its decoding error appended to ``errors``.
+    """
+    for index, line in enumerate(lines):
+        try:
+            yield line.decode('utf-8-sig' if index == 0 else 'utf-8')
+        except UnicodeDecodeError as exc:
+            errors.append(exc)
+            yield line.decode('utf-8', 'replace')
+
+
+def parse_rows(lines, fmt):
+    """Yield (line number, row) pairs from byte lines of NDJSON or CSV
+
+    Rows that cannot be decoded or parsed are yielded as exceptions so the
+    importer can report them along with the invalid recipes.
+    """
+    errors = []
+    lines = decode_lines(lines, errors)
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            if errors:
+                row = errors.pop()
+                errors.clear()
+            else:
+                for relation in RECIPE_RELATIONS:
+                    if relation.name in row:
+                        row[relation.name] = CSVRenderer.split_list(
+                            row[relation.name] or ''
+                        )
+            yield reader.line_num, row
+        return
+
+    for number, line in enumerate(lines, 1):
+        if errors:
+            yield number, errors.pop()
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = exc
+        yield number, row
+
+
+class ImportResult:
+    """Progress of an import run"""
+    max_errors = 100
+
+    def __init__(self, checkpoint=0):
+        self.checkpoint = checkpoint
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    @property
+    def rows_per_second(self):
+        elapsed = time.perf_counter() - self.started
+        processed = self.imported + self.failed
+        return round(processed / elapsed, 1) if elapsed else 0.0
+
+    def add_error(self, line, detail):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': detail})
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'checkpoint': self.checkpoint,
+            'rows_per_second': self.rows_per_second,
+        }
+
+
+class RecipeImporter:
+    """Write streamed recipe rows of a user in batches
+
+    Every batch resolves its new tag and ingredient names with one bulk
+    get-or-create per relation, inserts its recipes and their through
+    rows with ``bulk_create`` and commits. ``checkpoint`` counts the rows
+    consumed by committed batches: passing it back as ``start`` skips them
+    on the next run.
+    """
+
+    def __init__(self, user, batch_size=500):
+        self.user = user
+        self.batch_size = batch_size
+        self.names = {relation.name: {} for relation in RECIPE_RELATIONS}
+
+    def run(self, rows, start=0, on_batch=None):
+        """Import the (line, row) pairs after the first start ones"""
+        result = ImportResult(checkpoint=start)
+        rows = (row for index, row in enumerate(rows) if index >= start)
+        for batch in iter_chunks(rows, self.batch_size):
+            self.import_batch(batch, result)
+            result.checkpoint += len(batch)
+            if on_batch is not None:
+                on_batch(result)
+        return result
+
+    def import_batch(self, batch, result):
+        """Validate and write one batch in a single transaction"""
+        valid = []
+        for line, row in batch:
+            if isinstance(row, Exception):
+                result.add_error(line, [str(row)])
+                continue
+            serializer = RecipeImportSerializer(data=row)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+            else:
+                result.add_error(line, serializer.errors)
+        if not valid:
+            return
+
+        with transaction.atomic():
+            self.resolve_names(valid)
+            relations = [
+                {name: [known[value] for value in item.pop(name, [])]
+                 for name, known in self.names.items()}
+                for item in valid
+            ]
+            recipes = insert_recipes([
+                Recipe(user=self.user, **item) for item in valid
+            ], relations)
+        bump_version(self.user.pk)
+        invalidate_graph(self.user.pk)
+        result.imported += len(recipes)
+
+    def resolve_names(self, items):
+        """Fill the name to pk maps with the names used by the items"""
+        for relation in RECIPE_RELATIONS:
+            known = self.names[relation.name]
+            missing = {
+                value for item in items
+                for value in item.get(relation.name, ())
+                if value not in known
+            }
+            if missing:
+                found = relation.model.objects.bulk_get_or_create(
+                    self.user, missing
+                )
+                known.update((value, obj.pk) for value, obj in found.items())
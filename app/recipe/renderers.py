@@ -0,0 +1,141 @@
+import csv
+import io
+
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class StreamingJSONRenderer(JSONRenderer):
+    """JSON renderer that can also encode a list one chunk at a time
+
+    ``render_chunks`` produces the same bytes as ``render`` would for the
+    concatenated list, without ever holding more than one chunk of it.
+    """
+
+    def get_encoder(self):
+        """Return an encoder configured like ``render`` configures it"""
+        return self.encoder_class(
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict,
+            separators=SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        )
+
+    def render_chunks(self, chunks, renderer_context=None):
+        """Yield the encoded JSON array of the items of each chunk"""
+        encoder = self.get_encoder()
+        separator = encoder.item_separator
+        opening = '['
+        for items in chunks:
+            if not items:
+                continue
+            body = separator.join(encoder.encode(item) for item in items)
+            yield self._encode(opening + body)
+            opening = separator
+        yield b'[]' if opening == '[' else b']'
+
+    @staticmethod
+    def _encode(text):
+        # Same escaping as JSONRenderer.render, so the output stays a
+        # strict JavaScript subset.
+        text = text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return text.encode('utf-8')
+
+
+class NDJSONRenderer(StreamingJSONRenderer):
+    """Newline delimited JSON, one object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        items = data if isinstance(data, list) else [data]
+        return b''.join(self.render_chunks([items]))
+
+    def render_chunks(self, chunks, renderer_context=None):
+        """Yield the encoded lines of the items of each chunk"""
+        encoder = self.get_encoder()
+        for items in chunks:
+            if items:
+                yield self._encode(''.join(
+                    encoder.encode(item) + '\n' for item in items
+                ))
+
+
+class CSVRenderer(BaseRenderer):
+    """Comma separated values with a header row
+
+    List values are joined with ``list_separator`` within one cell, the
+    separator and ``escape_char`` inside values escaped with
+    ``escape_char``. The header comes from ``renderer_context['header']``
+    or the first item.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    list_separator = ';'
+    escape_char = '\\'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        items = data if isinstance(data, list) else [data]
+        return b''.join(self.render_chunks([items], renderer_context))
+
+    def render_chunks(self, chunks, renderer_context=None):
+        """Yield the header, then the encoded rows of each chunk"""
+        header = (renderer_context or {}).get('header')
+        started = False
+        for items in chunks:
+            if not items:
+                continue
+            if header is None:
+                header = list(items[0])
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if not started:
+                writer.writerow(header)
+                started = True
+            writer.writerows(
+                [self._cell(item.get(name)) for name in header]
+                for item in items
+            )
+            yield buffer.getvalue().encode(self.charset)
+        if not started and header:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(header)
+            yield buffer.getvalue().encode(self.charset)
+
+    @classmethod
+    def join_list(cls, values):
+        """Return the cell of a list of values"""
+        escape, separator = cls.escape_char, cls.list_separator
+        return separator.join(
+            str(value).replace(escape, escape * 2).replace(
+                separator, escape + separator
+            )
+            for value in values
+        )
+
+    @classmethod
+    def split_list(cls, cell):
+        """Return the non-empty values of a cell written by join_list"""
+        values, value = [], []
+        chars = iter(cell)
+        for char in chars:
+            if char == cls.escape_char:
+                value.append(next(chars, ''))
+            elif char == cls.list_separator:
+                values.append(''.join(value))
+                value = []
+            else:
+                value.append(char)
+        values.append(''.join(value))
+        return [value for value in values if value]
+
+    def _cell(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, (list, tuple)):
+            return self.join_list(value)
+        return value
@@ -0,0 +1,77 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector
+)
+from django.db import connections, router
+from django.db.models import (
+    Case, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Q,
+    Subquery, TextField, Value, When
+)
+from django.db.models.functions import Cast
+
+from core.models import RECIPE_RELATIONS, Recipe
+
+
+SEARCH_CONFIG = 'english'
+
+
+def full_text_enabled():
+    """Return whether recipes are searched through search_vector"""
+    connection = connections[router.db_for_read(Recipe)]
+    return connection.vendor == 'postgresql'
+
+
+def _related_names(relation):
+    """Return a subquery of the space separated names of a relation"""
+    target = relation.target
+    return Subquery(
+        relation.through.objects.filter(recipe=OuterRef('pk')).values(
+            'recipe'
+        ).annotate(
+            names=StringAgg(f'{target}__name', ' ')
+        ).values('names'),
+        output_field=TextField()
+    )
+
+
+def update_search_vectors(recipes):
+    """Recompute search_vector of the recipes in a single UPDATE
+
+    Titles weigh more than tag and ingredient names. On other databases
+    than PostgreSQL search falls back to plain lookups and this is a no-op.
+    """
+    if not full_text_enabled():
+        return
+    vector = SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    for relation in RECIPE_RELATIONS:
+        vector = vector + SearchVector(
+            _related_names(relation), weight='B', config=SEARCH_CONFIG
+        )
+    recipes.update(search_vector=vector)
+
+
+def search_recipes(queryset, term):
+    """Filter recipes matching the term, annotated with search_rank"""
+    if full_text_enabled():
+        query = SearchQuery(term, config=SEARCH_CONFIG)
+        rank = SearchRank(F('search_vector'), query)
+        # An integer rank compares exactly when used as a cursor position
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                ExpressionWrapper(rank * 1000000, output_field=FloatField()),
+                IntegerField()
+            )
+        )
+
+    matches = Q(title__icontains=term)
+    for relation in RECIPE_RELATIONS:
+        matches |= Q(pk__in=relation.through.objects.filter(
+            **{f'{relation.target}__name__icontains': term}
+        ).values('recipe_id'))
+    return queryset.filter(matches).annotate(
+        search_rank=Case(
+            When(title__icontains=term, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField()
+        )
+    )
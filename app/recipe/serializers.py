@@ -1,5 +1,17 @@
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from core.models import Tag, Ingredient, Recipe
+from rest_framework.settings import api_settings
+
+from core.db import delete_rows
+from core.models import RECIPE_RELATIONS, Tag, Ingredient, Recipe
+from recipe.bulk import add_links, insert_recipes, recount_links
+from recipe.fields import OwnedPrimaryKeysField
+from recipe.search import update_search_vectors
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -8,8 +20,8 @@ class TagSerializer(serializers.ModelSerializer):
     class Meta:
         """Meta definition for TagSerializer."""
         model = Tag
-        fields = ('id', 'name')
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -18,20 +30,68 @@ class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
         """Meta definition for IngredientSerializer."""
         model = Ingredient
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
+
+
+class RecipeTagSerializer(TagSerializer):
+    """Serialize a tag of a recipe, without its recipe_count
+
+    Counter changes do not touch the recipes showing the tag, so recipe
+    ETags could not follow them.
+    """
+
+    class Meta(TagSerializer.Meta):
         fields = ('id', 'name')
-        read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeIngredientSerializer(IngredientSerializer):
+    """Serialize an ingredient of a recipe, without its recipe_count"""
+
+    class Meta(IngredientSerializer.Meta):
+        fields = ('id', 'name')
+
+
+class RecipeAttrNamesSerializer(serializers.Serializer):
+    """Validate a list of tag or ingredient names"""
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class SparseFieldsMixin:
+    """Emit only context['fields'], inlining the context['expand'] ones"""
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.context.get('expand', ()):
+            fields[name] = self.expandable_fields[name](
+                many=True, read_only=True
+            )
+        requested = self.context.get('fields')
+        if requested:
+            fields = OrderedDict(
+                (name, field) for name, field in fields.items()
+                if name in requested
+            )
+        return fields
+
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Model definition for RecipeSerializer."""
+    expandable_fields = {
+        'ingredients': RecipeIngredientSerializer,
+        'tags': RecipeTagSerializer,
+    }
 
-    ingredients = serializers.PrimaryKeyRelatedField(
-        many=True,
+    ingredients = OwnedPrimaryKeysField(
         queryset=Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
+    tags = OwnedPrimaryKeysField(
         queryset=Tag.objects.all()
     )
 
@@ -45,5 +105,218 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 class RecipeDetailSerializer(RecipeSerializer):
     """Serialize the recipe details"""
-    ingredients = IngredientSerializer(many=True, read_only=True)
-    tags = TagSerializer(many=True, read_only=True)
+    ingredients = RecipeIngredientSerializer(many=True, read_only=True)
+    tags = RecipeTagSerializer(many=True, read_only=True)
+
+
+class RecipeExportSerializer(serializers.ModelSerializer):
+    """Serialize recipes with tag and ingredient names for export"""
+    ingredients = serializers.SlugRelatedField(
+        many=True, read_only=True, slug_field='name'
+    )
+    tags = serializers.SlugRelatedField(
+        many=True, read_only=True, slug_field='name'
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ('title', 'ingredients', 'tags',
+                  'time_minutes', 'price', 'link')
+
+
+class RecipePantrySerializer(serializers.Serializer):
+    """Validate the ingredients a user has for the cookable query"""
+    ingredients = OwnedPrimaryKeysField(queryset=Ingredient.objects.all())
+    missing = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=50)
+
+
+class RecipeBulkSerializer(serializers.ListSerializer):
+    """Validate and write many recipes with a fixed number of queries"""
+
+    max_items = 1000
+
+    default_error_messages = {
+        'too_many': _('Ensure this list has at most {max_items} items.'),
+        'duplicate': _('Recipe "{pk_value}" is listed more than once.'),
+        'required': _('This field is required.'),
+        'not_allowed': _('Ids cannot be set on recipes being created.'),
+        'does_not_exist': OwnedPrimaryKeysField.default_error_messages[
+            'does_not_exist'
+        ],
+    }
+
+    def to_internal_value(self, data):
+        """Validate every item and report errors aligned with the input"""
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        if len(data) > self.max_items:
+            message = self.error_messages['too_many'].format(
+                max_items=self.max_items
+            )
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [message]
+            }, code='too_many')
+
+        items, errors = [], []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                items.append({})
+                errors.append(exc.detail)
+
+        if self.instance is not None:
+            self._validate_ids(items, errors)
+        else:
+            self._reject_ids(items, errors)
+        self._validate_relations(items, errors)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def _validate_relations(self, items, errors):
+        """Check related objects belong to the user, one query each"""
+        user = self.context['request'].user
+        for relation in RECIPE_RELATIONS:
+            field = relation.name
+            pks = {pk for item in items for pk in item.get(field, ())}
+            found = set(relation.model.objects.filter(
+                user=user, pk__in=pks
+            ).values_list('pk', flat=True)) if pks else set()
+            for item, item_errors in zip(items, errors):
+                if field not in item:
+                    continue
+                item[field] = list(dict.fromkeys(item[field]))
+                missing = [pk for pk in item[field] if pk not in found]
+                if missing:
+                    item_errors[field] = [
+                        self.error_messages['does_not_exist'].format(
+                            pk_value=pk
+                        ) for pk in missing
+                    ]
+
+    def _validate_ids(self, items, errors):
+        """Check updated recipes exist in the instance queryset"""
+        ids = [item['id'] for item in items if 'id' in item]
+        found = set(self.instance.filter(
+            pk__in=ids
+        ).values_list('pk', flat=True)) if ids else set()
+
+        seen = set()
+        for item, item_errors in zip(items, errors):
+            pk = item.get('id')
+            if pk is None:
+                item_errors['id'] = [self.error_messages['required']]
+            elif pk in seen:
+                item_errors['id'] = [
+                    self.error_messages['duplicate'].format(pk_value=pk)
+                ]
+            elif pk not in found:
+                item_errors['id'] = [
+                    self.error_messages['does_not_exist'].format(pk_value=pk)
+                ]
+            seen.add(pk)
+
+    def _reject_ids(self, items, errors):
+        """Check created recipes leave their primary keys to the database"""
+        for item, item_errors in zip(items, errors):
+            if 'id' in item:
+                item_errors['id'] = [self.error_messages['not_allowed']]
+
+    def create(self, validated_data):
+        """Insert the recipes and their relations in bulk"""
+        relations = [self._pop_relations(item) for item in validated_data]
+        with transaction.atomic():
+            return insert_recipes(
+                [Recipe(**item) for item in validated_data], relations
+            )
+
+    def update(self, instance, validated_data):
+        """Update the recipes with one UPDATE statement"""
+        items = {item.pop('id'): item for item in validated_data}
+        relations = {pk: self._pop_relations(item)
+                     for pk, item in items.items()}
+        names = {name for item in items.values() for name in item}
+
+        changes = {'updated_at': timezone.now()}
+        for name in names:
+            field = Recipe._meta.get_field(name)
+            changes[name] = Case(*[
+                When(pk=pk, then=Value(item[name], output_field=field))
+                for pk, item in items.items() if name in item
+            ], default=F(name), output_field=field)
+
+        unlinked = {}
+        with transaction.atomic():
+            instance.filter(pk__in=items).update(**changes)
+            for relation in RECIPE_RELATIONS:
+                replaced = [pk for pk, item in relations.items()
+                            if relation.name in item]
+                if replaced:
+                    links = relation.through.objects.filter(
+                        recipe_id__in=replaced
+                    )
+                    unlinked[relation.name] = list(
+                        links.values_list(relation.column, flat=True)
+                    )
+                    delete_rows(links)
+            recipes = list(instance.filter(pk__in=items))
+            add_links((recipe, relations[recipe.pk]) for recipe in recipes)
+            recount_links(list(relations.values()) + [unlinked])
+            update_search_vectors(Recipe.objects.filter(pk__in=items))
+        return recipes
+
+    def _pop_relations(self, item):
+        """Remove the relation pk lists from validated item data"""
+        return {relation.name: item.pop(relation.name)
+                for relation in RECIPE_RELATIONS if relation.name in item}
+
+
+class RecipeBulkItemSerializer(RecipeSerializer):
+    """Validate one recipe of a bulk write"""
+
+    id = serializers.IntegerField(required=False)
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
+    tags = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
+
+    class Meta(RecipeSerializer.Meta):
+        """Meta definition for RecipeBulkItemSerializer."""
+        read_only_fields = ()
+        list_serializer_class = RecipeBulkSerializer
+
+
+class RecipeBulkDeleteSerializer(serializers.Serializer):
+    """Validate the ids of a bulk recipe delete"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=RecipeBulkSerializer.max_items
+    )
+
+    def validate_ids(self, value):
+        """Check every recipe exists in the queryset from the context"""
+        found = set(self.context['queryset'].filter(
+            pk__in=value
+        ).values_list('pk', flat=True))
+        missing = {
+            index: [RecipeBulkSerializer.default_error_messages[
+                'does_not_exist'
+            ].format(pk_value=pk)]
+            for index, pk in enumerate(value) if pk not in found
+        }
+        if missing:
+            raise serializers.ValidationError(missing)
+        return value
+
+    def delete(self):
+        """Delete the recipes, recounting their attrs once per model"""
+        self.context['queryset'].filter(
+            pk__in=self.validated_data['ids']
+        ).delete()
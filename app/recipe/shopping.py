@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from rest_framework.exceptions import ValidationError
+
+from recipe.stats import CENT
+
+
+def build_shopping_list(queryset, recipe_ids, name='recipes'):
+    """Return the merged ingredients and totals of the listed recipes
+
+    One query joins the recipes of the queryset to their ingredients, so
+    ids outside of it (other users' recipes) are found missing by the
+    same query that reads the list.
+    """
+    rows = queryset.filter(pk__in=recipe_ids).order_by().values_list(
+        'pk', 'price', 'time_minutes', 'ingredients__id', 'ingredients__name'
+    )
+    recipes = {}
+    ingredients = {}
+    for pk, price, time_minutes, ingredient_id, ingredient_name in rows:
+        recipes[pk] = (price, time_minutes)
+        if ingredient_id is None:
+            continue
+        item = ingredients.setdefault(ingredient_id, {
+            'id': ingredient_id, 'name': ingredient_name, 'recipes': []
+        })
+        item['recipes'].append(pk)
+
+    missing = [pk for pk in recipe_ids if pk not in recipes]
+    if missing:
+        raise ValidationError({name: [
+            f'Invalid pk "{pk}" - object does not exist.' for pk in missing
+        ]})
+
+    order = {pk: index for index, pk in enumerate(recipe_ids)}
+    for item in ingredients.values():
+        item['recipes'].sort(key=order.__getitem__)
+    return {
+        'recipes': list(recipe_ids),
+        'ingredients': sorted(
+            ingredients.values(), key=lambda item: (item['name'], item['id'])
+        ),
+        'price': str(sum(
+            (Decimal(price) for price, time_minutes in recipes.values()),
+            Decimal(0)
+        ).quantize(CENT)),
+        'time_minutes': sum(
+            time_minutes for price, time_minutes in recipes.values()
+        ),
+    }
@@ -0,0 +1,228 @@
+from django.conf import settings
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Tag, Ingredient, Recipe, get_recipe_relation
+from recipe.cache import bump_version
+from recipe.graph import invalidate_graph, update_graph
+from recipe.search import full_text_enabled, update_search_vectors
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Invalidate cached responses of the owner of a changed object"""
+    bump_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_user_cache_on_relation(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe relations change"""
+    if action.startswith('post_'):
+        bump_version(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def reset_user_cache(sender, instance, **kwargs):
+    """Start new and removed accounts from an empty cache namespace"""
+    bump_version(instance.pk)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_recipes_on_relation(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Bump updated_at of recipes whose tags or ingredients changed"""
+    if not reverse:
+        if action.startswith('post_'):
+            Recipe.objects.filter(pk=instance.pk).update(
+                updated_at=timezone.now()
+            )
+    elif action == 'pre_clear':
+        instance.recipe_set.update(updated_at=timezone.now())
+    elif action in ('post_add', 'post_remove') and pk_set:
+        Recipe.objects.filter(pk__in=pk_set).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_recipes_on_attr(sender, instance, created=False, **kwargs):
+    """Bump updated_at of recipes showing a changed tag or ingredient"""
+    if not created:
+        instance.recipe_set.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    """Recompute the search vector of a saved recipe"""
+    if full_text_enabled():
+        update_search_vectors(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_recipes_on_relation(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Recompute search vectors of recipes whose relations changed"""
+    if not full_text_enabled():
+        return
+    if not reverse:
+        if action.startswith('post_'):
+            update_search_vectors(Recipe.objects.filter(pk=instance.pk))
+    elif action == 'pre_clear':
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        update_search_vectors(
+            Recipe.objects.filter(pk__in=instance._cleared_recipe_ids)
+        )
+    elif action in ('post_add', 'post_remove') and pk_set:
+        update_search_vectors(Recipe.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def index_recipes_on_attr_rename(sender, instance, created, **kwargs):
+    """Recompute search vectors of recipes showing a renamed attr"""
+    if full_text_enabled() and not created:
+        update_search_vectors(
+            Recipe.objects.filter(pk__in=instance.recipe_set.values('pk'))
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_recipes_on_attr_delete(sender, instance, **kwargs):
+    """Remember the recipes of an attr before its links are deleted"""
+    if full_text_enabled():
+        instance._deleted_recipe_ids = list(
+            instance.recipe_set.values_list('pk', flat=True)
+        )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_recipes_on_attr_delete(sender, instance, **kwargs):
+    """Recompute search vectors of recipes that lost a deleted attr"""
+    recipe_ids = getattr(instance, '_deleted_recipe_ids', None)
+    if recipe_ids:
+        update_search_vectors(Recipe.objects.filter(pk__in=recipe_ids))
+
+
+def _linked_attrs(sender, instance, reverse, pk_set):
+    """Return (attr model, linked attr pks) of the affected links
+
+    On the reverse side every link points at the instance itself, so its
+    pk is repeated once per linked recipe.
+    """
+    relation = get_recipe_relation(through=sender)
+    links = sender.objects.all()
+    if reverse:
+        links = links.filter(**{relation.target: instance})
+        if pk_set is not None:
+            links = links.filter(recipe_id__in=pk_set)
+        return relation.model, [instance.pk] * links.count()
+
+    links = links.filter(recipe_id=instance.pk)
+    if pk_set is not None:
+        links = links.filter(**{f'{relation.column}__in': pk_set})
+    pks = list(links.values_list(relation.column, flat=True))
+    return relation.model, pks
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_recipes_on_relation(sender, instance, action, reverse, model,
+                              pk_set, **kwargs):
+    """Keep recipe_count of tags and ingredients in step with links"""
+    if action == 'post_add' and pk_set:
+        if reverse:
+            type(instance).objects.adjust_recipe_count(
+                [instance.pk], len(pk_set)
+            )
+        else:
+            model.objects.adjust_recipe_count(pk_set, 1)
+    elif action in ('pre_remove', 'pre_clear'):
+        # Removals are announced with every requested pk, linked or not
+        instance.__dict__.setdefault('_unlinked_attrs', {})[sender] = \
+            _linked_attrs(sender, instance, reverse, pk_set)
+    elif action in ('post_remove', 'post_clear'):
+        attr_model, pks = instance._unlinked_attrs.pop(sender)
+        if reverse:
+            attr_model.objects.adjust_recipe_count(pks[:1], -len(pks))
+        else:
+            attr_model.objects.adjust_recipe_count(pks, -1)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reset_user_graph(sender, instance, created, **kwargs):
+    """Start new accounts from an empty similarity graph"""
+    if created:
+        invalidate_graph(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def add_recipe_to_graph(sender, instance, created, **kwargs):
+    """Add a new recipe to the similarity graph of its owner"""
+    if created:
+        pk = instance.pk
+        update_graph(instance.user_id, lambda graph: graph.add_recipe(pk))
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_graph(sender, instance, **kwargs):
+    """Remove a deleted recipe from the similarity graph of its owner"""
+    # The collector clears the pk of deleted instances before the commit
+    pk = instance.pk
+    update_graph(instance.user_id, lambda graph: graph.remove_recipe(pk))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def remove_attr_from_graph(sender, instance, **kwargs):
+    """Remove a deleted tag or ingredient from the similarity graph"""
+    feature = (get_recipe_relation(model=sender).name, instance.pk)
+    update_graph(
+        instance.user_id, lambda graph: graph.remove_feature(feature)
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_graph_on_relation(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """Apply changed recipe relations to the similarity graph"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    relation = get_recipe_relation(through=sender).name
+    instance_pk, pks = instance.pk, set(pk_set or ())
+
+    def change(graph):
+        if action == 'post_clear':
+            if reverse:
+                graph.remove_feature((relation, instance_pk))
+            else:
+                graph.unlink_relation(instance_pk, relation)
+            return
+        apply = graph.link if action == 'post_add' else graph.unlink
+        for pk in pks:
+            if reverse:
+                apply(pk, (relation, instance_pk))
+            else:
+                apply(instance_pk, (relation, pk))
+
+    update_graph(instance.user_id, change)
@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.db.models import Avg, Count, Max, Min, Q
+
+from core.models import RECIPE_RELATIONS
+
+
+PRICE_BUCKETS = tuple(Decimal(bound) for bound in (0, 5, 10, 20, 50, 100))
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    return None if value is None else str(Decimal(value).quantize(CENT))
+
+
+def recipe_stats(queryset, price_buckets=PRICE_BUCKETS, top=10):
+    """Return aggregate statistics of the recipes of a queryset
+
+    Counts, ranges and the price histogram come from one aggregate query,
+    every bucket being a filtered ``COUNT``. The top tags and ingredients
+    take one grouped count over each through table.
+    """
+    queryset = queryset.order_by()
+    bounds = list(zip(price_buckets, price_buckets[1:] + (None,)))
+    buckets = {}
+    for index, (lower, upper) in enumerate(bounds):
+        condition = Q(price__gte=lower)
+        if upper is not None:
+            condition &= Q(price__lt=upper)
+        buckets[f'bucket_{index}'] = Count('pk', filter=condition)
+
+    totals = queryset.aggregate(
+        count=Count('pk'),
+        time_avg=Avg('time_minutes'),
+        time_min=Min('time_minutes'),
+        time_max=Max('time_minutes'),
+        price_avg=Avg('price'),
+        price_min=Min('price'),
+        price_max=Max('price'),
+        **buckets
+    )
+
+    stats = {
+        'count': totals['count'],
+        'time_minutes': {
+            'avg': None if totals['time_avg'] is None
+            else round(totals['time_avg'], 1),
+            'min': totals['time_min'],
+            'max': totals['time_max'],
+        },
+        'price': {
+            'avg': _money(totals['price_avg']),
+            'min': _money(totals['price_min']),
+            'max': _money(totals['price_max']),
+        },
+        'price_histogram': [
+            {'min': _money(lower), 'max': _money(upper),
+             'count': totals[f'bucket_{index}']}
+            for index, (lower, upper) in enumerate(bounds)
+        ],
+    }
+    for relation in RECIPE_RELATIONS:
+        stats[f'top_{relation.name}'] = top_related(queryset, relation, top)
+    return stats
+
+
+def top_related(queryset, relation, top=10):
+    """Return the tags or ingredients used by most recipes of a queryset"""
+    target = relation.target
+    rows = relation.through.objects.filter(
+        recipe__in=queryset.values('pk')
+    ).values(f'{target}_id', f'{target}__name').annotate(
+        count=Count('recipe_id')
+    ).order_by('-count', f'{target}__name', f'{target}_id')[:top]
+    return [
+        {'id': row[f'{target}_id'], 'name': row[f'{target}__name'],
+         'count': row['count']}
+        for row in rows
+    ]
@@ -0,0 +1,210 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def recipe_payload(index, **params):
+    """Return a recipe payload for a bulk request"""
+    payload = {
+        'title': f'Recipe {index}',
+        'time_minutes': 10 + index,
+        'price': '5.00',
+    }
+    payload.update(params)
+    return payload
+
+
+class BulkRecipeApiTests(TestCase):
+    """Test the bulk recipe endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Salt'
+        )
+
+    def test_bulk_create(self):
+        """Test creating many recipes with their relations"""
+        payload = [
+            recipe_payload(i, tags=[self.tag.id],
+                           ingredients=[self.ingredient.id])
+            for i in range(3)
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 3)
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tags.all()), [self.tag])
+            self.assertEqual(list(recipe.ingredients.all()), [self.ingredient])
+
+    def test_bulk_create_validates_relations_once(self):
+        """Test relation validation does not query per item"""
+        def create_queries(count):
+            payload = [
+                recipe_payload(i, tags=[self.tag.id],
+                               ingredients=[self.ingredient.id])
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(BULK_URL, payload, format='json')
+            return [q['sql'] for q in queries
+                    if q['sql'].startswith('SELECT')]
+
+        self.assertEqual(len(create_queries(1)), len(create_queries(10)))
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test invalid items are reported and nothing is created"""
+        user2 = get_user_model().objects.create_user(
+            'test2@gmail.com',
+            'testtest'
+        )
+        other_tag = Tag.objects.create(user=user2, name='Other')
+        payload = [
+            recipe_payload(0),
+            recipe_payload(1, tags=[other_tag.id]),
+            recipe_payload(2, title=''),
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('tags', res.data[1])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_rejects_ids(self):
+        """Test created recipes cannot choose or reuse primary keys"""
+        user2 = get_user_model().objects.create_user(
+            'test2@gmail.com',
+            'testtest'
+        )
+        theirs = sample_recipe(user=user2, title='Soup')
+        payload = [
+            recipe_payload(0, id=theirs.id),
+            recipe_payload(1, id=9999),
+            recipe_payload(2),
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[0])
+        self.assertIn('id', res.data[1])
+        self.assertEqual(res.data[2], {})
+        self.assertEqual(list(Recipe.objects.all()), [theirs])
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.user, user2)
+
+    def test_bulk_update(self):
+        """Test updating fields and relations of many recipes"""
+        recipe1 = sample_recipe(user=self.user, title='Soup')
+        recipe2 = sample_recipe(user=self.user, title='Cake')
+        recipe2.tags.add(self.tag)
+        payload = [
+            {'id': recipe1.id, 'title': 'Hot soup',
+             'tags': [self.tag.id]},
+            {'id': recipe2.id, 'price': '7.50', 'tags': []},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(recipe1.title, 'Hot soup')
+        self.assertEqual(str(recipe2.price), '7.50')
+        self.assertEqual(recipe2.title, 'Cake')
+        self.assertEqual(list(recipe1.tags.all()), [self.tag])
+        self.assertFalse(recipe2.tags.exists())
+
+    def test_bulk_update_other_user_recipe(self):
+        """Test recipes of other users cannot be updated"""
+        user2 = get_user_model().objects.create_user(
+            'test2@gmail.com',
+            'testtest'
+        )
+        recipe = sample_recipe(user=user2, title='Soup')
+
+        res = self.client.patch(
+            BULK_URL, [{'id': recipe.id, 'title': 'Mine'}], format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[0])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Soup')
+
+    def test_bulk_delete(self):
+        """Test deleting many recipes"""
+        recipe1 = sample_recipe(user=self.user)
+        recipe2 = sample_recipe(user=self.user)
+        kept = sample_recipe(user=self.user)
+
+        res = self.client.delete(
+            BULK_URL, {'ids': [recipe1.id, recipe2.id]}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Recipe.objects.all()), [kept])
+
+    def test_bulk_delete_queries_constant(self):
+        """Test deleting many recipes runs as many queries as one"""
+        def delete_queries(count):
+            ids = []
+            for i in range(count):
+                recipe = sample_recipe(user=self.user)
+                recipe.tags.add(self.tag)
+                recipe.ingredients.add(self.ingredient)
+                ids.append(recipe.id)
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.delete(
+                    BULK_URL, {'ids': ids}, format='json'
+                )
+            self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+            return len(queries)
+
+        self.assertEqual(delete_queries(1), delete_queries(20))
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 0)
+
+    def test_bulk_delete_missing(self):
+        """Test nothing is deleted when a recipe is missing"""
+        recipe = sample_recipe(user=self.user)
+
+        res = self.client.delete(
+            BULK_URL, {'ids': [recipe.id, 999]}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(1, res.data['ids'])
+        self.assertTrue(Recipe.objects.filter(pk=recipe.pk).exists())
@@ -0,0 +1,147 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and Last-Modified handling of the recipe API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_sets_validators(self):
+        """Test list responses carry an ETag and details Last-Modified"""
+        recipe = sample_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+        self.assertNotIn('Last-Modified', res)
+        res = self.client.get(detail_url(recipe.id))
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match costs one query and returns 304"""
+        sample_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        """Test conditional retrieve of an unchanged recipe"""
+        recipe = sample_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_on_delete(self):
+        """Test deleting a recipe changes the list ETag"""
+        sample_recipe(user=self.user, title='Soup')
+        recipe = sample_recipe(user=self.user, title='Cake')
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        self.client.delete(detail_url(recipe.id))
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_modified_since_after_delete(self):
+        """Test If-Modified-Since does not hide a deleted recipe"""
+        sample_recipe(user=self.user, title='Soup')
+        recipe = sample_recipe(user=self.user, title='Cake')
+        last_modified = self.client.get(detail_url(recipe.id))[
+            'Last-Modified'
+        ]
+
+        self.client.delete(detail_url(recipe.id))
+        res = self.client.get(RECIPES_URL,
+                              HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_detail_etag_changes_on_tag_rename(self):
+        """Test renaming a tag changes the ETag of recipes using it"""
+        recipe = sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        Recipe.objects.filter(pk=recipe.pk).update(
+            updated_at=recipe.updated_at.replace(year=2000)
+        )
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_etag_ignores_tag_counters(self):
+        """Test a tag linked elsewhere leaves recipe responses unchanged"""
+        recipe = sample_recipe(user=self.user)
+        other = sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        res = self.client.get(detail_url(recipe.id))
+        etag = res['ETag']
+
+        other.tags.add(tag)
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.data['tags'], [{'id': tag.id, 'name': 'Vegan'}])
+
+    def test_tags_not_modified(self):
+        """Test conditional list of tags"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_recipe_not_found(self):
+        """Test conditional retrieve of a missing recipe is a 404"""
+        res = self.client.get(detail_url(999), HTTP_IF_NONE_MATCH='"x"')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Ingredient
+from recipe.graph import get_graph
+
+COOKABLE_URL = reverse('recipe:recipe-cookable')
+
+
+class CookableRecipesApiTests(TransactionTestCase):
+    """Test listing the recipes a pantry of ingredients covers"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+        self.salt, self.egg, self.flour, self.milk = (
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Salt', 'Egg', 'Flour', 'Milk')
+        )
+        self.omelette = self.sample_recipe('Omelette', self.salt, self.egg)
+        self.pancakes = self.sample_recipe(
+            'Pancakes', self.egg, self.flour, self.milk
+        )
+        self.bread = self.sample_recipe('Bread', self.salt, self.flour)
+
+    def sample_recipe(self, title, *ingredients, user=None):
+        """Create and return a recipe with the given ingredients"""
+        recipe = Recipe.objects.create(
+            user=user or self.user, title=title, time_minutes=5, price=1
+        )
+        recipe.ingredients.add(*ingredients)
+        return recipe
+
+    def cookable(self, *ingredients, **params):
+        """Post a pantry and return the response"""
+        payload = {'ingredients': [i.id for i in ingredients]}
+        payload.update(params)
+        return self.client.post(COOKABLE_URL, payload, format='json')
+
+    def test_fully_covered(self):
+        """Test only recipes with every ingredient at hand are listed"""
+        res = self.cookable(self.salt, self.egg, self.milk)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data],
+                         [self.omelette.id])
+        self.assertEqual(res.data[0]['missing_ingredients'], [])
+        self.assertEqual(res.data[0]['title'], 'Omelette')
+
+    def test_missing_at_most_k(self):
+        """Test recipes lacking up to k ingredients rank by missing count"""
+        res = self.cookable(self.salt, self.egg, missing=2)
+
+        self.assertEqual(
+            [(item['id'], item['missing_ingredients']) for item in res.data],
+            [(self.omelette.id, []),
+             (self.bread.id, [self.flour.id]),
+             (self.pancakes.id, sorted([self.flour.id, self.milk.id]))]
+        )
+
+        res = self.cookable(self.salt, self.egg, missing=2, limit=2)
+        self.assertEqual([item['id'] for item in res.data],
+                         [self.omelette.id, self.bread.id])
+
+    def test_ties_rank_newest_first(self):
+        """Test recipes missing as many ingredients rank newest first"""
+        res = self.cookable(self.salt, missing=1)
+
+        self.assertEqual([item['id'] for item in res.data],
+                         [self.bread.id, self.omelette.id])
+
+    def test_follows_relation_changes(self):
+        """Test the index follows added and removed ingredients"""
+        self.assertEqual(len(self.cookable(self.salt, self.egg).data), 1)
+        graph = get_graph(self.user.pk)
+
+        self.omelette.ingredients.add(self.milk)
+        self.assertEqual(self.cookable(self.salt, self.egg).data, [])
+
+        self.pancakes.ingredients.remove(self.milk)
+        res = self.cookable(self.egg, self.flour)
+        self.assertEqual([item['id'] for item in res.data],
+                         [self.pancakes.id])
+        self.assertIs(get_graph(self.user.pk), graph)
+
+    def test_other_users_ingredients_rejected(self):
+        """Test pantries naming other users' ingredients are rejected"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'testtest'
+        )
+        theirs = Ingredient.objects.create(user=other, name='Salt')
+        self.sample_recipe('Theirs', theirs, user=other)
+
+        res = self.cookable(theirs)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ingredients', res.data)
+
+    def test_invalid_params(self):
+        """Test negative missing counts and oversized limits are rejected"""
+        res = self.cookable(self.salt, missing=-1)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.cookable(self.salt, limit=1000)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
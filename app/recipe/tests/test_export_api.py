@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.views import RecipeViewSet
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class RecipeExportApiTests(TestCase):
+    """Test streaming recipe exports"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        dessert = Tag.objects.create(user=self.user, name='Dessert')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.soup = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=20, price=3.5
+        )
+        self.soup.tags.add(vegan)
+        self.soup.ingredients.add(salt)
+        self.cake = Recipe.objects.create(
+            user=self.user, title='Cake', time_minutes=60, price=8,
+            link='https://example.com/cake'
+        )
+        self.cake.tags.add(dessert, vegan)
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as newline delimited JSON"""
+        with patch.object(RecipeViewSet, 'export_chunk_size', 1):
+            res = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(res['X-Total-Count'], '2')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'title': 'Soup', 'ingredients': ['Salt'], 'tags': ['Vegan'],
+             'time_minutes': 20, 'price': '3.50', 'link': ''},
+            {'title': 'Cake', 'ingredients': [], 'tags': ['Vegan', 'Dessert'],
+             'time_minutes': 60, 'price': '8.00',
+             'link': 'https://example.com/cake'},
+        ])
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV with joined names"""
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('recipes.csv', res['Content-Disposition'])
+        body = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(rows[1]['tags'], 'Vegan;Dessert')
+        self.assertEqual(rows[1]['price'], '8.00')
+        self.assertEqual(rows[0]['ingredients'], 'Salt')
+
+    def test_export_filtered(self):
+        """Test exports honour the list filters"""
+        res = self.client.get(EXPORT_URL, {
+            'format': 'csv', 'max_time': 30
+        })
+
+        body = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row['title'] for row in rows], ['Soup'])
+
+    def test_export_empty_csv(self):
+        """Test an empty CSV export still has its header"""
+        Recipe.objects.all().delete()
+
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(
+            b''.join(res.streaming_content).decode().strip(),
+            'title,ingredients,tags,time_minutes,price,link'
+        )
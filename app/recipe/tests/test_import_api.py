@@ -0,0 +1,218 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.importer import RecipeImporter, parse_rows
+
+IMPORT_URL = reverse('recipe:recipe-import-recipes')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+NDJSON = '\n'.join(json.dumps(row) for row in [
+    {'title': 'Soup', 'tags': ['Vegan'], 'ingredients': ['Salt', 'Leek'],
+     'time_minutes': 20, 'price': '3.50'},
+    {'title': 'Cake', 'tags': ['Vegan', 'Dessert'], 'time_minutes': 60,
+     'price': '8.00', 'link': 'https://example.com/cake'},
+    {'title': 'Broken', 'time_minutes': 'soon', 'price': '1.00'},
+    {'title': 'Tea', 'time_minutes': 5, 'price': '0.50'},
+]) + '\n'
+
+
+class RecipeImporterTests(TestCase):
+    """Test importing streamed recipe rows"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+
+    def test_import_ndjson(self):
+        """Test rows are imported with their tags and ingredients"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        importer = RecipeImporter(self.user, batch_size=2)
+
+        result = importer.run(
+            parse_rows(NDJSON.encode().splitlines(), 'ndjson')
+        )
+
+        self.assertEqual(result.imported, 3)
+        self.assertEqual(result.failed, 1)
+        self.assertEqual(result.errors[0]['line'], 3)
+        self.assertEqual(result.checkpoint, 4)
+        cake = Recipe.objects.get(user=self.user, title='Cake')
+        self.assertEqual(
+            sorted(cake.tags.values_list('name', flat=True)),
+            ['Dessert', 'Vegan']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Tag.objects.get(name='Vegan').recipe_count, 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
+
+    def test_import_resumes_after_checkpoint(self):
+        """Test rows before the start checkpoint are skipped"""
+        importer = RecipeImporter(self.user, batch_size=2)
+
+        result = importer.run(
+            parse_rows(NDJSON.encode().splitlines(), 'ndjson'), start=2
+        )
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.checkpoint, 4)
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)), ['Tea']
+        )
+
+    def test_import_csv(self):
+        """Test CSV rows split their names on the list separator"""
+        lines = [
+            b'title,ingredients,tags,time_minutes,price,link\r\n',
+            b'Salad,Feta;Olives,,10,4.25,\r\n',
+        ]
+
+        result = RecipeImporter(self.user).run(parse_rows(lines, 'csv'))
+
+        self.assertEqual(result.imported, 1)
+        salad = Recipe.objects.get(title='Salad')
+        self.assertEqual(
+            sorted(salad.ingredients.values_list('name', flat=True)),
+            ['Feta', 'Olives']
+        )
+        self.assertFalse(salad.tags.exists())
+
+    def test_import_csv_with_byte_order_mark(self):
+        """Test a leading UTF-8 byte order mark is not part of the header"""
+        lines = [
+            b'\xef\xbb\xbftitle,time_minutes,price\r\n',
+            b'Salad,10,4.25\r\n',
+        ]
+
+        result = RecipeImporter(self.user).run(parse_rows(lines, 'csv'))
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.failed, 0)
+
+    def test_undecodable_lines_fail_alone(self):
+        """Test a line that is not UTF-8 is reported as a row error"""
+        lines = NDJSON.encode().splitlines()
+        lines.insert(2, b'{"title": "Caf\xe9"}')
+
+        result = RecipeImporter(self.user, batch_size=2).run(
+            parse_rows(lines, 'ndjson')
+        )
+
+        self.assertEqual(result.imported, 3)
+        self.assertEqual(result.failed, 2)
+        self.assertEqual(
+            [error['line'] for error in result.errors], [3, 4]
+        )
+        self.assertIn('utf-8', result.errors[0]['errors'][0])
+        self.assertEqual(result.checkpoint, 5)
+
+
+class RecipeImportApiTests(TestCase):
+    """Test the recipe upload endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_upload_ndjson(self):
+        """Test uploading a NDJSON file reports its progress"""
+        upload = SimpleUploadedFile('recipes.ndjson', NDJSON.encode())
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['imported'], 3)
+        self.assertEqual(res.data['failed'], 1)
+        self.assertEqual(res.data['checkpoint'], 4)
+        self.assertIn('rows_per_second', res.data)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+
+    def test_upload_csv_with_byte_order_mark(self):
+        """Test a CSV saved with a byte order mark imports every row"""
+        upload = SimpleUploadedFile(
+            'recipes.csv',
+            '\ufefftitle,time_minutes,price\r\nSalad,10,4.25\r\n'
+            .encode('utf-8')
+        )
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['imported'], 1)
+        self.assertEqual(res.data['failed'], 0)
+
+    def test_upload_without_file(self):
+        """Test uploading nothing is rejected"""
+        res = self.client.post(IMPORT_URL, {}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_import_round_trip(self):
+        """Test an exported CSV imports into an identical collection"""
+        soup = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=20, price=3.5
+        )
+        soup.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        soup.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Salt')
+        )
+        exported = b''.join(self.client.get(
+            EXPORT_URL, {'format': 'csv'}
+        ).streaming_content)
+
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(other)
+        res = self.client.post(IMPORT_URL, {
+            'file': SimpleUploadedFile('backup.csv', exported)
+        })
+        reexported = b''.join(self.client.get(
+            EXPORT_URL, {'format': 'csv'}
+        ).streaming_content)
+
+        self.assertEqual(res.data['imported'], 1)
+        self.assertEqual(reexported, exported)
+
+    def test_round_trip_names_with_separator(self):
+        """Test names holding the list separator survive a CSV round trip"""
+        soup = Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=20, price=3.5
+        )
+        names = ['Salt; pepper', 'Back\\slash;', 'Vegan']
+        soup.tags.add(*(
+            Tag.objects.create(user=self.user, name=name) for name in names
+        ))
+        exported = b''.join(self.client.get(
+            EXPORT_URL, {'format': 'csv'}
+        ).streaming_content)
+
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(other)
+        res = self.client.post(IMPORT_URL, {
+            'file': SimpleUploadedFile('backup.csv', exported)
+        })
+
+        self.assertEqual(res.data['imported'], 1)
+        self.assertEqual(
+            sorted(Tag.objects.filter(user=other).values_list(
+                'name', flat=True
+            )),
+            sorted(names)
+        )
@@ -0,0 +1,338 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.helpers import QueryBudgetMixin, routed_handlers
+from recipe import urls
+from recipe.views import RecipeViewSet, TagViewSet, IngredientViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+EXPORT_URL = reverse('recipe:recipe-export')
+IMPORT_URL = reverse('recipe:recipe-import-recipes')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail url"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test recipe endpoints run a bounded number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = self.sample_recipe()
+
+    def sample_recipe(self, **params):
+        """Create and return a sample recipe"""
+        defaults = {'title': 'Sample recipe', 'time_minutes': 10,
+                    'price': 5.00}
+        defaults.update(params)
+        return Recipe.objects.create(user=self.user, **defaults)
+
+    def attrs(self, model, count):
+        """Return count attrs of the user, creating missing ones"""
+        existing = model.objects.filter(user=self.user).count()
+        model.objects.bulk_create([
+            model(user=self.user, name=f'{model.__name__} {i}')
+            for i in range(existing, count)
+        ])
+        return list(model.objects.filter(user=self.user)[:count])
+
+    def link_attrs(self, recipe, count):
+        """Link count tags and ingredients to the recipe"""
+        recipe.tags.set(self.attrs(Tag, count))
+        recipe.ingredients.set(self.attrs(Ingredient, count))
+
+    def payload(self, count, **params):
+        """Return a recipe payload referencing count tags and ingredients"""
+        payload = {
+            'title': 'Posted', 'time_minutes': 5, 'price': '2.50',
+            'tags': [tag.id for tag in self.attrs(Tag, count)],
+            'ingredients': [
+                ingredient.id for ingredient in self.attrs(Ingredient, count)
+            ],
+        }
+        payload.update(params)
+        return payload
+
+    def add_recipes(self, count):
+        """Bring the user's recipes to count, each with a tag"""
+        tag = self.attrs(Tag, 1)[0]
+        for i in range(Recipe.objects.filter(user=self.user).count(), count):
+            self.sample_recipe(title=f'Recipe {i}').tags.add(tag)
+
+    def test_list(self):
+        self.assertQueryBudget(
+            RecipeViewSet, 'list',
+            lambda rows: self.client.get(RECIPES_URL, {'page_size': 100}),
+            self.add_recipes
+        )
+
+    def test_list_search(self):
+        self.assertQueryBudget(
+            RecipeViewSet, 'list',
+            lambda rows: self.client.get(RECIPES_URL, {'search': 'recipe'}),
+            self.add_recipes
+        )
+
+    def test_retrieve(self):
+        self.assertQueryBudget(
+            RecipeViewSet, 'retrieve',
+            lambda rows: self.client.get(detail_url(self.recipe.id)),
+            lambda rows: self.link_attrs(self.recipe, rows)
+        )
+
+    def test_create(self):
+        def add_rows(rows):
+            self.body = self.payload(rows)
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'create',
+            lambda rows: self.client.post(
+                RECIPES_URL, self.body, format='json'
+            ),
+            add_rows
+        )
+
+    def test_update(self):
+        def add_rows(rows):
+            self.link_attrs(self.recipe, rows)
+            self.body = self.payload(rows)
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'update',
+            lambda rows: self.client.put(
+                detail_url(self.recipe.id), self.body, format='json'
+            ),
+            add_rows
+        )
+
+    def test_partial_update(self):
+        def add_rows(rows):
+            self.link_attrs(self.recipe, rows)
+            self.body = {'tags': self.payload(rows)['tags']}
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'partial_update',
+            lambda rows: self.client.patch(
+                detail_url(self.recipe.id), self.body, format='json'
+            ),
+            add_rows
+        )
+
+    def test_destroy(self):
+        def add_rows(rows):
+            self.recipe = self.sample_recipe()
+            self.link_attrs(self.recipe, rows)
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'destroy',
+            lambda rows: self.client.delete(detail_url(self.recipe.id)),
+            add_rows
+        )
+
+    def check_bulk(self, items, attrs):
+        """Check bulk writes of items(n) recipes with attrs(n) attrs each"""
+        # SQLite cannot return the ids of a bulk INSERT, so there created
+        # recipes are saved one by one (see core.db.bulk_create_with_pks)
+        per_row = None
+        if not connection.features.can_return_ids_from_bulk_insert:
+            def per_row(sql):
+                return sql.startswith('INSERT INTO "core_recipe" ')
+
+        def add_items(rows):
+            self.body = [self.payload(attrs(rows), title=f'Posted {i}')
+                         for i in range(items(rows))]
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'bulk',
+            lambda rows: self.client.post(BULK_URL, self.body, format='json'),
+            add_items, per_row
+        )
+
+        def add_recipes(rows):
+            recipes = [self.sample_recipe() for i in range(items(rows))]
+            for recipe in recipes:
+                self.link_attrs(recipe, attrs(rows))
+            self.body = [self.payload(attrs(rows), id=recipe.id)
+                         for recipe in recipes]
+            self.ids = [recipe.id for recipe in recipes]
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'bulk',
+            lambda rows: self.client.patch(
+                BULK_URL, self.body, format='json'
+            ),
+            add_recipes
+        )
+        self.assertQueryBudget(
+            RecipeViewSet, 'bulk',
+            lambda rows: self.client.delete(
+                BULK_URL, {'ids': self.ids}, format='json'
+            ),
+            add_recipes
+        )
+
+    def test_bulk_items(self):
+        self.check_bulk(items=lambda rows: rows, attrs=lambda rows: 1)
+
+    def test_bulk_attrs(self):
+        self.check_bulk(items=lambda rows: 1, attrs=lambda rows: rows)
+
+    def test_stats(self):
+        self.assertQueryBudget(
+            RecipeViewSet, 'stats',
+            lambda rows: self.client.get(reverse('recipe:recipe-stats')),
+            self.add_recipes
+        )
+
+    def test_shopping_list(self):
+        def add_rows(rows):
+            self.link_attrs(self.recipe, rows)
+            self.add_recipes(rows)
+            self.recipe_ids = list(Recipe.objects.filter(
+                user=self.user
+            ).values_list('pk', flat=True))
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'shopping_list',
+            lambda rows: self.client.get(
+                reverse('recipe:recipe-shopping-list'),
+                {'recipes': ','.join(map(str, self.recipe_ids))}
+            ),
+            add_rows
+        )
+
+    def test_similar(self):
+        def add_rows(rows):
+            self.recipe.tags.add(*self.attrs(Tag, 1))
+            self.add_recipes(rows + 1)
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'similar',
+            lambda rows: self.client.get(
+                reverse('recipe:recipe-similar', args=[self.recipe.id]),
+                {'limit': 100}
+            ),
+            add_rows
+        )
+
+    def test_cookable(self):
+        def add_rows(rows):
+            self.salt = salt = self.attrs(Ingredient, 1)[0]
+            for i in range(Recipe.objects.filter(user=self.user).count(),
+                           rows + 1):
+                self.sample_recipe(title=f'Recipe {i}').ingredients.add(salt)
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'cookable',
+            lambda rows: self.client.post(
+                reverse('recipe:recipe-cookable'),
+                {'ingredients': [self.salt.id],
+                 'limit': 100},
+                format='json'
+            ),
+            add_rows
+        )
+
+    def test_export(self):
+        def export(rows):
+            res = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+            b''.join(res.streaming_content)
+            return res
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'export', export, self.add_recipes
+        )
+
+    def test_import_recipes(self):
+        def upload(rows):
+            row = json.dumps({
+                'title': 'Imported', 'time_minutes': 5, 'price': '1.00',
+                'tags': [f'Imported {i}' for i in range(rows)],
+            })
+            return self.client.post(IMPORT_URL, {
+                'file': SimpleUploadedFile('recipes.ndjson', row.encode())
+            })
+
+        self.assertQueryBudget(
+            RecipeViewSet, 'import_recipes', upload, lambda rows: None
+        )
+
+
+class RecipeAttrQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test tag and ingredient endpoints run a bounded number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+
+    def add_attrs(self, model):
+        """Return add_rows bringing the user's attrs of model to n"""
+        def add_rows(rows):
+            recipe = Recipe.objects.create(
+                user=self.user, title='Recipe', time_minutes=5, price=1
+            )
+            existing = model.objects.filter(user=self.user).count()
+            for i in range(existing, rows):
+                getattr(recipe, f'{model._meta.model_name}s').add(
+                    model.objects.create(user=self.user, name=f'Attr {i}')
+                )
+        return add_rows
+
+    def test_attr_endpoints(self):
+        for view, model in ((TagViewSet, Tag),
+                            (IngredientViewSet, Ingredient)):
+            name = model._meta.model_name
+            url = reverse(f'recipe:{name}-list')
+            bulk_url = reverse(f'recipe:{name}-bulk')
+            add_rows = self.add_attrs(model)
+
+            self.assertQueryBudget(
+                view, 'list',
+                lambda rows: self.client.get(url, {'assigned_only': 1}),
+                add_rows
+            )
+            self.assertQueryBudget(
+                view, 'create',
+                lambda rows: self.client.post(url, {'name': f'New {rows}'}),
+                add_rows
+            )
+            self.assertQueryBudget(
+                view, 'bulk',
+                lambda rows: self.client.post(bulk_url, {
+                    'names': [f'Bulk {rows} {i}' for i in range(rows)]
+                }, format='json'),
+                lambda rows: None
+            )
+
+
+class RecipeRouteBudgetTests(TestCase):
+    """Test every recipe route declares a query budget"""
+
+    def test_routes_have_budgets(self):
+        for name, view, action in routed_handlers(urls.urlpatterns):
+            if name == 'api-root':
+                # The router's index runs no queries
+                continue
+            self.assertIn(
+                action, getattr(view, 'query_budgets', {}),
+                f'{view.__name__} has no query budget for {action}'
+            )
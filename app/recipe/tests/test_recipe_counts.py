@@ -0,0 +1,167 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+TAGS_URL = reverse('recipe:tag-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def count(obj):
+    """Return the stored recipe_count of a tag or ingredient"""
+    obj.refresh_from_db()
+    return obj.recipe_count
+
+
+class RecipeCountTests(TestCase):
+    """Test recipe_count follows the links of tags and ingredients"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.other = Tag.objects.create(user=self.user, name='Dessert')
+        self.recipes = [
+            Recipe.objects.create(
+                user=self.user, title=f'Recipe {i}',
+                time_minutes=5, price=1
+            )
+            for i in range(3)
+        ]
+
+    def test_add_remove_clear(self):
+        """Test adding, removing and clearing from the recipe side"""
+        recipe = self.recipes[0]
+        recipe.tags.add(self.tag, self.other)
+        recipe.tags.add(self.tag)
+        self.assertEqual(count(self.tag), 1)
+
+        recipe.tags.remove(self.tag)
+        recipe.tags.remove(self.tag)
+        self.assertEqual(count(self.tag), 0)
+        self.assertEqual(count(self.other), 1)
+
+        recipe.tags.clear()
+        self.assertEqual(count(self.other), 0)
+
+    def test_reverse_add_remove_clear(self):
+        """Test adding, removing and clearing from the tag side"""
+        self.tag.recipe_set.add(*self.recipes)
+        self.assertEqual(count(self.tag), 3)
+
+        self.tag.recipe_set.remove(self.recipes[0], self.recipes[0])
+        self.assertEqual(count(self.tag), 2)
+
+        self.tag.recipe_set.clear()
+        self.assertEqual(count(self.tag), 0)
+
+    def test_delete_recipe(self):
+        """Test deleting recipes decrements their attrs"""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        for recipe in self.recipes:
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(salt)
+
+        self.recipes[0].delete()
+        Recipe.objects.filter(pk=self.recipes[1].pk).delete()
+
+        self.assertEqual(count(self.tag), 1)
+        self.assertEqual(count(salt), 1)
+
+    def test_delete_queries_constant(self):
+        """Test queryset and account deletes recount once per model"""
+        def delete_queries(recipes, delete):
+            user = get_user_model().objects.create_user(
+                f'{delete.__name__}{recipes}@gmail.com', 'testtest'
+            )
+            tag = Tag.objects.create(user=user, name='Vegan')
+            salt = Ingredient.objects.create(user=user, name='Salt')
+            for i in range(recipes):
+                recipe = Recipe.objects.create(
+                    user=user, title=f'Recipe {i}', time_minutes=5, price=1
+                )
+                recipe.tags.add(tag)
+                recipe.ingredients.add(salt)
+            kept = Recipe.objects.create(
+                user=user, title='Kept', time_minutes=5, price=1
+            )
+            kept.tags.add(tag)
+            with CaptureQueriesContext(connection) as queries:
+                delete(user)
+            if Tag.objects.filter(pk=tag.pk).exists():
+                self.assertEqual(count(tag), 1)
+                self.assertEqual(count(salt), 0)
+            return len(queries)
+
+        def delete_recipes(user):
+            Recipe.objects.filter(user=user).exclude(title='Kept').delete()
+
+        def delete_user(user):
+            user.delete()
+
+        self.assertEqual(
+            delete_queries(1, delete_recipes),
+            delete_queries(20, delete_recipes)
+        )
+        self.assertEqual(
+            delete_queries(1, delete_user),
+            delete_queries(20, delete_user)
+        )
+
+    def test_bulk_endpoint(self):
+        """Test bulk writes keep the counters in step"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.post(BULK_URL, [
+            {'title': 'Soup', 'time_minutes': 5, 'price': '1.00',
+             'tags': [self.tag.id]},
+            {'title': 'Cake', 'time_minutes': 5, 'price': '1.00',
+             'tags': [self.tag.id, self.other.id]},
+        ], format='json')
+        self.assertEqual(count(self.tag), 2)
+
+        client.patch(BULK_URL, [
+            {'id': res.data[1]['id'], 'tags': [self.other.id]},
+        ], format='json')
+        self.assertEqual(count(self.tag), 1)
+        self.assertEqual(count(self.other), 1)
+
+        client.delete(BULK_URL, {'ids': [res.data[0]['id']]}, format='json')
+        self.assertEqual(count(self.tag), 0)
+        self.assertEqual(count(self.other), 1)
+
+    def test_order_tags_by_popularity(self):
+        """Test listing the most used tags first"""
+        self.other.recipe_set.add(*self.recipes[:2])
+        self.tag.recipe_set.add(self.recipes[0])
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(TAGS_URL, {'ordering': 'popular'})
+
+        self.assertEqual(
+            [(tag['name'], tag['recipe_count'])
+             for tag in res.data['results']],
+            [('Dessert', 2), ('Vegan', 1)]
+        )
+
+    def test_repair_recipe_counts(self):
+        """Test the repair command fixes drifted counters"""
+        self.tag.recipe_set.add(*self.recipes)
+        Tag.objects.filter(pk=self.tag.pk).update(recipe_count=7)
+        out = StringIO()
+
+        call_command('repair_recipe_counts', stdout=out)
+
+        self.assertEqual(count(self.tag), 3)
+        self.assertIn('1 tags counters repaired', out.getvalue())
@@ -1,4 +1,9 @@
+import base64
+import json
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
@@ -66,11 +71,11 @@ class PrivateRecipeApiTest(TestCase):
 
         res = self.client.get(RECIPES_URL)
 
-        recipes = Recipe.objects.all()
+        recipes = Recipe.objects.all().order_by('-title', '-id')
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_limited_to_user(self):
         """Test that the user receive only his recipes"""
@@ -88,8 +93,9 @@ class PrivateRecipeApiTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['title'], serializer.data[0]['title'])
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['title'],
+                         serializer.data[0]['title'])
 
     def test_view_recipe_detail(self):
         """Test viewing a recipe detail"""
@@ -157,3 +163,290 @@ class PrivateRecipeApiTest(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertEqual(len(ingredients), 2)
+
+    def test_list_recipes_query_count_constant(self):
+        """Test listing recipes does not query once per recipe"""
+        def list_queries():
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.get(RECIPES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user)
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+        baseline = list_queries()
+
+        for i in range(10):
+            recipe = sample_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+
+        self.assertEqual(list_queries(), baseline)
+
+    def test_retrieve_recipe_query_count(self):
+        """Test recipe detail loads its relations with one query each"""
+        recipe = sample_recipe(user=self.user)
+        for i in range(5):
+            recipe.tags.add(sample_tag(user=self.user, name=f'tag{i}'))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f'ingredient{i}')
+            )
+
+        # ETag aggregate, the recipe and one query per relation
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(len(res.data['tags']), 5)
+        self.assertEqual(len(res.data['ingredients']), 5)
+
+    def test_list_recipes_paginated_by_cursor(self):
+        """Test paging through recipes with duplicate titles"""
+        for title in ['Soup', 'Soup', 'Cake', 'Soup', 'Bread']:
+            sample_recipe(user=self.user, title=title)
+        expected = list(
+            Recipe.objects.order_by('-title', '-id').values_list(
+                'id', flat=True)
+        )
+
+        seen = []
+        url = RECIPES_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(recipe['id'] for recipe in res.data['results'])
+            url = res.data['next']
+
+        self.assertEqual(seen, expected)
+
+    def test_list_recipes_previous_page(self):
+        """Test the previous cursor returns the page before"""
+        for i in range(5):
+            sample_recipe(user=self.user, title='Soup')
+
+        first = self.client.get(RECIPES_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_list_recipes_invalid_cursor(self):
+        """Test an unparsable cursor is rejected"""
+        res = self.client.get(RECIPES_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_recipes_tampered_cursor(self):
+        """Test cursor positions of the wrong type are rejected"""
+        sample_recipe(user=self.user)
+
+        for position in (['x', 'abc'], ['x', [1]], ['x', None],
+                         [{'a': 1}, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(
+                {'p': position, 'r': False}
+            ).encode()).decode()
+            res = self.client.get(RECIPES_URL, {'cursor': cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_recipe_validates_tags_in_one_query(self):
+        """Test submitted tags are resolved with a single query"""
+        tags = [sample_tag(user=self.user, name=f'tag{i}') for i in range(10)]
+        payload = {
+            'title': 'Base Recipe',
+            'time_minutes': 30,
+            'price': 5.00,
+            'tags': [tag.id for tag in tags],
+            'ingredients': []
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPES_URL, payload, format='json')
+
+        tag_lookups = [
+            q['sql'] for q in queries
+            if q['sql'].startswith('SELECT') and 'FROM "core_tag"' in q['sql']
+            and 'INNER JOIN' not in q['sql']
+        ]
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(tag_lookups), 1)
+
+    def test_create_recipe_with_other_user_tag(self):
+        """Test tags of other users are rejected"""
+        user2 = get_user_model().objects.create_user(
+            'test2@gmai.com',
+            'testtest'
+        )
+        tag = sample_tag(user=self.user, name='mine')
+        other_tag = sample_tag(user=user2, name='theirs')
+        payload = {
+            'title': 'Base Recipe',
+            'time_minutes': 30,
+            'price': 5.00,
+            'tags': [tag.id, other_tag.id]
+        }
+
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['tags']), 1)
+        self.assertIn(str(other_tag.id), res.data['tags'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_filter_recipes_by_tags(self):
+        """Test returning recipes with any of the given tags"""
+        recipe1 = sample_recipe(user=self.user, title='Thai curry')
+        recipe2 = sample_recipe(user=self.user, title='Tahini')
+        recipe3 = sample_recipe(user=self.user, title='Fish and chips')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Vegetarian')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(sorted(ids), sorted([recipe1.id, recipe2.id]))
+        self.assertNotIn(recipe3.id, ids)
+
+    def test_filter_recipes_by_all_tags(self):
+        """Test returning recipes having all of the given tags"""
+        recipe1 = sample_recipe(user=self.user, title='Thai curry')
+        recipe2 = sample_recipe(user=self.user, title='Tahini')
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Vegetarian')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': f'{tag1.id},{tag2.id}',
+            'match': 'all'
+        })
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe1.id])
+
+    def test_filter_recipes_by_ingredients_time_and_price(self):
+        """Test combining ingredient, time and price filters"""
+        ingredient = sample_ingredient(user=self.user, name='Feta')
+        match = sample_recipe(user=self.user, title='Salad',
+                              time_minutes=10, price=4.00)
+        slow = sample_recipe(user=self.user, title='Pie',
+                             time_minutes=60, price=4.00)
+        pricey = sample_recipe(user=self.user, title='Platter',
+                               time_minutes=10, price=20.00)
+        for recipe in (match, slow, pricey):
+            recipe.ingredients.add(ingredient)
+
+        res = self.client.get(RECIPES_URL, {
+            'ingredients': ingredient.id,
+            'max_time': 30,
+            'price_lt': '10.50'
+        })
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [match.id])
+
+    def test_filter_recipes_query_count(self):
+        """Test filtering runs a constant number of queries"""
+        tag = sample_tag(user=self.user, name='Vegan')
+
+        def filtered_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(RECIPES_URL, {'tags': tag.id, 'match': 'all'})
+            return len(queries)
+
+        sample_recipe(user=self.user).tags.add(tag)
+        baseline = filtered_queries()
+        for i in range(10):
+            sample_recipe(user=self.user, title=f'Recipe {i}').tags.add(tag)
+
+        self.assertEqual(filtered_queries(), baseline)
+
+    def test_filter_recipes_invalid(self):
+        """Test invalid filter values are rejected"""
+        res = self.client.get(RECIPES_URL, {'tags': 'vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_recipes(self):
+        """Test searching recipes by title, tag and ingredient names"""
+        by_title = sample_recipe(user=self.user, title='Lemon tart')
+        by_tag = sample_recipe(user=self.user, title='Sorbet')
+        by_tag.tags.add(sample_tag(user=self.user, name='Lemony'))
+        by_ingredient = sample_recipe(user=self.user, title='Fish')
+        by_ingredient.ingredients.add(
+            sample_ingredient(user=self.user, name='Lemon zest')
+        )
+        sample_recipe(user=self.user, title='Steak')
+
+        res = self.client.get(RECIPES_URL, {'search': 'lemon'})
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids[0], by_title.id)
+        self.assertCountEqual(ids[1:], [by_tag.id, by_ingredient.id])
+
+    def test_search_recipes_paginates_by_rank(self):
+        """Test search results page through every match exactly once"""
+        tag = sample_tag(user=self.user, name='Pasta')
+        expected = []
+        for i in range(5):
+            expected.append(
+                sample_recipe(user=self.user, title=f'Pasta {i}').id
+            )
+            other = sample_recipe(user=self.user, title=f'Bake {i}')
+            other.tags.add(tag)
+            expected.append(other.id)
+
+        ids, url, params = [], RECIPES_URL, {'search': 'pasta', 'page_size': 3}
+        while url:
+            res = self.client.get(url, params)
+            ids.extend(recipe['id'] for recipe in res.data['results'])
+            url, params = res.data['next'], None
+
+        self.assertCountEqual(ids, expected)
+        titles = [Recipe.objects.get(pk=pk).title for pk in ids]
+        self.assertTrue(all(t.startswith('Pasta') for t in titles[:5]))
+
+    def test_list_recipes_sparse_fields(self):
+        """Test ?fields= narrows both the output and the SQL"""
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+        recipe.ingredients.add(sample_ingredient(user=self.user))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'title,id'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'], [{'id': recipe.id, 'title': recipe.title}]
+        )
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse(any('core_recipe_tags' in query for query in sql))
+        self.assertFalse(any('"price"' in query for query in sql))
+
+    def test_list_recipes_expand_tags(self):
+        """Test ?expand=tags inlines the tag objects"""
+        recipe = sample_recipe(user=self.user)
+        tag = sample_tag(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+
+        res = self.client.get(RECIPES_URL, {
+            'fields': 'id,price', 'expand': 'tags'
+        })
+
+        self.assertEqual(res.data['results'], [{
+            'id': recipe.id,
+            'tags': [{'id': tag.id, 'name': 'Vegan'}],
+            'price': '5.00',
+        }])
+
+    def test_list_recipes_unknown_fields(self):
+        """Test unknown sparse fields are rejected"""
+        res = self.client.get(RECIPES_URL, {'fields': 'id,secret'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
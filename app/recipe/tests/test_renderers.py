@@ -0,0 +1,99 @@
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.renderers import StreamingJSONRenderer
+from recipe.views import RecipeViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class StreamingJSONRendererTests(TestCase):
+    """Test encoding lists chunk by chunk"""
+
+    def test_chunks_match_render(self):
+        """Test the streamed bytes equal the rendered list"""
+        items = [
+            {'id': 1, 'price': Decimal('5.00'), 'title': 'Crème brûlée'},
+            {'id': 2, 'price': Decimal('0.50'), 'title': 'Tea'},
+            {'id': 3, 'price': None, 'title': ''},
+        ]
+        renderer = StreamingJSONRenderer()
+
+        streamed = b''.join(
+            renderer.render_chunks([items[:2], [], items[2:]])
+        )
+
+        self.assertEqual(streamed, JSONRenderer().render(items))
+
+    def test_no_chunks(self):
+        """Test an empty stream is an empty array"""
+        renderer = StreamingJSONRenderer()
+
+        self.assertEqual(b''.join(renderer.render_chunks([])), b'[]')
+
+
+class StreamingListApiTests(TestCase):
+    """Test streaming unpaginated list responses"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_stream_recipes(self):
+        """Test ?stream=1 streams every recipe in list order"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe {i}',
+                time_minutes=i, price=i * 1.5
+            )
+            recipe.tags.add(tag)
+        paged = self.client.get(RECIPES_URL, {'page_size': 100})
+
+        with patch.object(RecipeViewSet, 'stream_chunk_size', 2):
+            res = self.client.get(RECIPES_URL, {'stream': 1})
+
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        body = b''.join(res.streaming_content)
+        self.assertEqual(body, JSONRenderer().render(paged.data['results']))
+        self.assertEqual(json.loads(body)[0]['price'], '6.00')
+
+    def test_stream_recipes_not_cached(self):
+        """Test streamed responses are not stored in the response cache"""
+        Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=2
+        )
+
+        first = self.client.get(RECIPES_URL, {'stream': 'true'})
+        b''.join(first.streaming_content)
+        second = self.client.get(RECIPES_URL, {'stream': 'true'})
+
+        self.assertTrue(second.streaming)
+        body = b''.join(second.streaming_content)
+        self.assertEqual(len(json.loads(body)), 1)
+
+    def test_stream_tags(self):
+        """Test attribute lists stream too"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        res = self.client.get(TAGS_URL, {'stream': 1})
+
+        names = [tag['name'] for tag in json.loads(
+            b''.join(res.streaming_content)
+        )]
+        self.assertEqual(names, ['Vegan', 'Dessert'])
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Ingredient
+
+SHOPPING_LIST_URL = reverse('recipe:recipe-shopping-list')
+
+
+class ShoppingListApiTests(TestCase):
+    """Test merging the ingredients of several recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+        self.salt, self.egg, self.flour = (
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Salt', 'Egg', 'Flour')
+        )
+        self.omelette = self.sample_recipe(
+            'Omelette', 10, '3.50', self.salt, self.egg
+        )
+        self.bread = self.sample_recipe(
+            'Bread', 60, '2.25', self.salt, self.flour
+        )
+        self.water = self.sample_recipe('Water', 1, '0.00')
+
+    def sample_recipe(self, title, time_minutes, price, *ingredients,
+                      user=None):
+        """Create and return a recipe with the given ingredients"""
+        recipe = Recipe.objects.create(
+            user=user or self.user, title=title,
+            time_minutes=time_minutes, price=price
+        )
+        recipe.ingredients.add(*ingredients)
+        return recipe
+
+    def shopping_list(self, *recipes):
+        """Request the shopping list of the recipes"""
+        return self.client.get(SHOPPING_LIST_URL, {
+            'recipes': ','.join(str(recipe.id) for recipe in recipes)
+        })
+
+    def test_merged_ingredients_and_totals(self):
+        """Test ingredients are deduplicated and totals summed"""
+        res = self.shopping_list(self.bread, self.omelette, self.water)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipes'], [
+            self.bread.id, self.omelette.id, self.water.id
+        ])
+        self.assertEqual(res.data['ingredients'], [
+            {'id': self.egg.id, 'name': 'Egg',
+             'recipes': [self.omelette.id]},
+            {'id': self.flour.id, 'name': 'Flour',
+             'recipes': [self.bread.id]},
+            {'id': self.salt.id, 'name': 'Salt',
+             'recipes': [self.bread.id, self.omelette.id]},
+        ])
+        self.assertEqual(res.data['price'], '5.75')
+        self.assertEqual(res.data['time_minutes'], 71)
+
+    def test_single_query(self):
+        """Test the list is read with one query however many recipes"""
+        recipes = [
+            self.sample_recipe(f'Recipe {i}', 5, '1.00', self.egg)
+            for i in range(50)
+        ]
+        with self.assertNumQueries(1):
+            res = self.shopping_list(*recipes)
+        self.assertEqual(res.data['time_minutes'], 250)
+        self.assertEqual(len(res.data['ingredients'][0]['recipes']), 50)
+
+    def test_other_users_recipes_rejected(self):
+        """Test ids of other users' recipes are rejected"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'testtest'
+        )
+        theirs = self.sample_recipe('Theirs', 5, '1.00', user=other)
+
+        res = self.shopping_list(self.omelette, theirs)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['recipes'], [
+            f'Invalid pk "{theirs.id}" - object does not exist.'
+        ])
+
+    def test_invalid_ids(self):
+        """Test missing, malformed and too many ids are rejected"""
+        res = self.client.get(SHOPPING_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(SHOPPING_LIST_URL, {'recipes': '1,a'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(SHOPPING_LIST_URL, {
+            'recipes': ','.join(str(pk) for pk in range(1, 102))
+        })
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
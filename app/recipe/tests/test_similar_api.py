@@ -0,0 +1,193 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.graph import RecipeGraph, get_graph, get_graph_version
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def similar_url(recipe_id):
+    """Return the similar recipes url of a recipe"""
+    return reverse('recipe:recipe-similar', args=[recipe_id])
+
+
+def ranking(graph, recipe_id, limit=10, metric='jaccard'):
+    """Return the ranked recipe ids and rounded scores"""
+    return [(pk, round(score, 6))
+            for pk, score in graph.similar(recipe_id, limit, metric)]
+
+
+class SimilarRecipesApiTests(TransactionTestCase):
+    """Test the similar recipes endpoint and its graph"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+        self.salt, self.egg, self.flour = (
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Salt', 'Egg', 'Flour')
+        )
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe = self.sample_recipe(
+            'Pancakes', [self.salt, self.egg, self.flour], [self.vegan]
+        )
+
+    def sample_recipe(self, title, ingredients=(), tags=(), user=None):
+        """Create and return a recipe with the given relations"""
+        recipe = Recipe.objects.create(
+            user=user or self.user, title=title, time_minutes=5, price=1
+        )
+        recipe.ingredients.add(*ingredients)
+        recipe.tags.add(*tags)
+        return recipe
+
+    def test_ranks_by_jaccard(self):
+        """Test recipes are ranked by shared over combined features"""
+        crepes = self.sample_recipe(
+            'Crepes', [self.salt, self.egg, self.flour]
+        )
+        omelette = self.sample_recipe('Omelette', [self.salt, self.egg])
+        self.sample_recipe('Toast')
+
+        res = self.client.get(similar_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['id'], item['similarity']) for item in res.data],
+            [(crepes.id, 0.75), (omelette.id, 0.5)]
+        )
+        self.assertEqual(res.data[0]['title'], 'Crepes')
+
+    def test_cosine_and_limit(self):
+        """Test the cosine metric and limiting the results"""
+        crepes = self.sample_recipe('Crepes', [self.salt, self.egg])
+        self.sample_recipe('Salad', [self.salt])
+
+        res = self.client.get(
+            similar_url(self.recipe.id), {'metric': 'cosine', 'limit': 1}
+        )
+
+        self.assertEqual([item['id'] for item in res.data], [crepes.id])
+        self.assertEqual(res.data[0]['similarity'], round(2 / 8 ** 0.5, 4))
+
+    def test_invalid_params(self):
+        """Test unknown metrics and bad limits are rejected"""
+        url = similar_url(self.recipe.id)
+        res = self.client.get(url, {'metric': 'euclid'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(url, {'limit': 'ten'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_recipes(self):
+        """Test other users' recipes are neither queried nor ranked"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'testtest'
+        )
+        theirs = self.sample_recipe('Theirs', [self.salt], user=other)
+
+        res = self.client.get(similar_url(theirs.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(similar_url(self.recipe.id))
+        self.assertEqual(res.data, [])
+
+    def test_graph_updates_incrementally(self):
+        """Test relation changes update the cached graph in place"""
+        crepes = self.sample_recipe('Crepes', [self.salt])
+        graph = get_graph(self.user.pk)
+
+        crepes.ingredients.add(self.egg)
+        self.vegan.recipe_set.add(crepes)
+        self.flour.delete()
+        new = self.sample_recipe('Scramble', [self.egg])
+
+        self.assertIs(get_graph(self.user.pk), graph)
+        rebuilt = RecipeGraph.build(self.user.pk, graph.version)
+        self.assertEqual(
+            ranking(graph, self.recipe.id),
+            ranking(rebuilt, self.recipe.id)
+        )
+        self.assertEqual(ranking(graph, self.recipe.id)[0], (crepes.id, 1.0))
+
+        self.recipe.ingredients.clear()
+        self.vegan.recipe_set.clear()
+        new.delete()
+        self.assertIs(get_graph(self.user.pk), graph)
+        self.assertEqual(ranking(graph, self.recipe.id), [])
+        self.assertEqual(ranking(graph, crepes.id), [])
+
+    def test_rolled_back_changes_skip_graph(self):
+        """Test the graph only takes changes that were committed"""
+        crepes = self.sample_recipe('Crepes', [self.salt])
+        graph = get_graph(self.user.pk)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                crepes.ingredients.add(self.egg, self.flour)
+                self.sample_recipe('Omelette', [self.salt, self.egg])
+                raise RuntimeError
+        with transaction.atomic():
+            crepes.ingredients.add(self.egg)
+
+        self.assertIs(get_graph(self.user.pk), graph)
+        rebuilt = RecipeGraph.build(self.user.pk, graph.version)
+        self.assertEqual(
+            ranking(graph, self.recipe.id),
+            ranking(rebuilt, self.recipe.id)
+        )
+        self.assertEqual(
+            ranking(graph, self.recipe.id), [(crepes.id, 0.5)]
+        )
+
+    def test_follows_changes_of_other_recipes(self):
+        """Test the ranking is not revalidated against one recipe alone"""
+        crepes = self.sample_recipe('Crepes', [self.salt])
+        res = self.client.get(similar_url(self.recipe.id))
+        self.assertEqual([item['id'] for item in res.data], [crepes.id])
+        self.assertNotIn('ETag', res)
+
+        omelette = self.sample_recipe('Omelette')
+        omelette.tags.add(self.vegan)
+        res = self.client.get(similar_url(self.recipe.id),
+                              HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data],
+                         [omelette.id, crepes.id])
+
+    def test_bulk_writes_rebuild_graph(self):
+        """Test writes without signals make the next query rebuild"""
+        graph = get_graph(self.user.pk)
+        version = get_graph_version(self.user.pk)
+
+        res = self.client.post(BULK_URL, [{
+            'title': 'Crepes', 'time_minutes': 5, 'price': '1.00',
+            'ingredients': [self.salt.id, self.egg.id, self.flour.id],
+            'tags': [self.vegan.id],
+        }], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(get_graph_version(self.user.pk), version)
+
+        res = self.client.get(similar_url(self.recipe.id))
+        self.assertIsNot(get_graph(self.user.pk), graph)
+        self.assertEqual(res.data[0]['similarity'], 1.0)
+
+    def test_ties_rank_newest_first(self):
+        """Test equal scores are ranked by descending id"""
+        first = self.sample_recipe('First', [self.salt])
+        second = self.sample_recipe('Second', [self.egg])
+
+        res = self.client.get(similar_url(self.recipe.id), {'limit': 1})
+
+        self.assertEqual([item['id'] for item in res.data], [second.id])
+        self.assertLess(first.id, second.id)
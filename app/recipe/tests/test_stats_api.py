@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+STATS_URL = reverse('recipe:recipe-stats')
+
+
+class RecipeStatsApiTests(TestCase):
+    """Test the recipe statistics endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+
+        self.sample_recipe(5, '2.50', self.vegan, self.quick)
+        self.sample_recipe(10, '7.00', self.vegan)
+        self.sample_recipe(30, '120.00')
+
+    def sample_recipe(self, time_minutes, price, *tags, user=None):
+        """Create and return a recipe with the given tags and salt"""
+        recipe = Recipe.objects.create(
+            user=user or self.user, title='Recipe',
+            time_minutes=time_minutes, price=price
+        )
+        recipe.tags.add(*tags)
+        if user is None:
+            recipe.ingredients.add(self.salt)
+        return recipe
+
+    def test_stats(self):
+        """Test counts, ranges, histogram and top relations"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'testtest'
+        )
+        self.sample_recipe(1, '90.00', user=other)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(
+            res.data['time_minutes'], {'avg': 15.0, 'min': 5, 'max': 30}
+        )
+        self.assertEqual(
+            res.data['price'],
+            {'avg': '43.17', 'min': '2.50', 'max': '120.00'}
+        )
+        self.assertEqual(
+            [(b['min'], b['max'], b['count'])
+             for b in res.data['price_histogram']],
+            [('0.00', '5.00', 1), ('5.00', '10.00', 1),
+             ('10.00', '20.00', 0), ('20.00', '50.00', 0),
+             ('50.00', '100.00', 0), ('100.00', None, 1)]
+        )
+        self.assertEqual(res.data['top_tags'], [
+            {'id': self.vegan.id, 'name': 'Vegan', 'count': 2},
+            {'id': self.quick.id, 'name': 'Quick', 'count': 1},
+        ])
+        self.assertEqual(res.data['top_ingredients'], [
+            {'id': self.salt.id, 'name': 'Salt', 'count': 3},
+        ])
+
+    def test_stats_filtered(self):
+        """Test the recipe filters narrow the statistics"""
+        res = self.client.get(STATS_URL, {'max_time': 10})
+
+        self.assertEqual(res.data['count'], 2)
+        self.assertEqual(res.data['price']['max'], '7.00')
+        self.assertEqual(res.data['top_ingredients'][0]['count'], 2)
+
+    def test_stats_empty(self):
+        """Test a user without recipes gets empty statistics"""
+        Recipe.objects.filter(user=self.user).delete()
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['count'], 0)
+        self.assertEqual(
+            res.data['price'], {'avg': None, 'min': None, 'max': None}
+        )
+        self.assertEqual(res.data['top_tags'], [])
+
+    def test_stats_cache_invalidated(self):
+        """Test cached statistics follow writes to recipes and tags"""
+        self.assertEqual(self.client.get(STATS_URL).data['count'], 3)
+        with self.assertNumQueries(1):
+            # Only the conditional request validators are queried
+            self.client.get(STATS_URL)
+
+        self.sample_recipe(20, '15.00', self.quick)
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.data['count'], 4)
+        self.assertEqual(res.data['top_tags'][0]['count'], 2)
+
+        self.vegan.name = 'Plant based'
+        self.vegan.save()
+        res = self.client.get(STATS_URL)
+        self.assertIn('Plant based',
+                      [tag['name'] for tag in res.data['top_tags']])
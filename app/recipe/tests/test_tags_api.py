@@ -5,11 +5,12 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Tag, Recipe
 from recipe.serializers import TagSerializer
 
 
 TAGS_URL = reverse('recipe:tag-list')
+TAGS_BULK_URL = reverse('recipe:tag-bulk')
 
 
 class PublicTagsApiTests(TestCase):
@@ -46,7 +47,7 @@ class PrivateTagsApiTests(TestCase):
         tags = Tag.objects.all().order_by('-name')
         serializers = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializers.data)
+        self.assertEqual(res.data['results'], serializers.data)
 
     def test_tags_limited_to_user(self):
         """Test that tags are returned to authed user"""
@@ -61,8 +62,8 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_successful(self):
         """Test creating new Tag"""
@@ -83,3 +84,55 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.post(payload)
 
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_duplicate_tag_invalid(self):
+        """Test creating a tag with an existing name fails"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_get_or_create_tags(self):
+        """Test resolving tag names, creating only the missing ones"""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.post(
+            TAGS_BULK_URL,
+            {'names': ['Vegan', 'Dessert', 'Vegan']},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['name'] for tag in res.data],
+                         ['Vegan', 'Dessert'])
+        self.assertEqual(res.data[0]['id'], vegan.id)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_get_or_create_tags_per_user(self):
+        """Test names of other users are not reused"""
+        user2 = get_user_model().objects.create_user(
+            "test2@gmail.com",
+            "testtest2"
+        )
+        other = Tag.objects.create(user=user2, name='Vegan')
+
+        res = self.client.post(
+            TAGS_BULK_URL, {'names': ['Vegan']}, format='json'
+        )
+
+        self.assertNotEqual(res.data[0]['id'], other.id)
+
+    def test_retrieve_tags_assigned_to_recipes(self):
+        """Test filtering tags by those assigned to recipes"""
+        tag1 = Tag.objects.create(user=self.user, name='Breakfast')
+        Tag.objects.create(user=self.user, name='Lunch')
+        recipe = Recipe.objects.create(
+            title='Eggs', time_minutes=10, price=5.00, user=self.user
+        )
+        recipe.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        tag1.refresh_from_db()
+        self.assertEqual(res.data['results'], [TagSerializer(tag1).data])
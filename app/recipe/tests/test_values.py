@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import bump_version
+from recipe.views import RecipeViewSet, TagViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class ValuesSerializerParityTests(TestCase):
+    """Test values() list pages render exactly like the serializers"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest'
+        )
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+            for i in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ingredient {i}')
+            for i in range(3)
+        ]
+        for i in range(12):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i % 4}',
+                time_minutes=i,
+                price=i * 1.25,
+                link='https://example.com' if i % 2 else ''
+            )
+            recipe.tags.add(*reversed(tags[:i % 4]))
+            recipe.ingredients.add(*ingredients[i % 3:])
+
+    def assertParity(self, url, viewset, params=None):
+        """Assert both list paths return the same bytes on every page"""
+        while url:
+            bump_version(self.user.pk)
+            fast = self.client.get(url, params)
+            bump_version(self.user.pk)
+            with patch.object(viewset, 'values_serializer_class', None):
+                slow = self.client.get(url, params)
+
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(fast.content, slow.content)
+            url, params = fast.data['next'], None
+
+    def test_recipe_list_parity(self):
+        """Test recipe pages match the model serializer"""
+        self.assertParity(RECIPES_URL, RecipeViewSet, {'page_size': 5})
+
+    def test_recipe_list_sparse_parity(self):
+        """Test sparse and expanded recipe pages match"""
+        self.assertParity(RECIPES_URL, RecipeViewSet, {
+            'fields': 'price,title', 'expand': 'tags', 'page_size': 5
+        })
+        self.assertParity(RECIPES_URL, RecipeViewSet, {
+            'expand': 'ingredients,tags'
+        })
+
+    def test_recipe_search_parity(self):
+        """Test ranked search pages match"""
+        self.assertParity(RECIPES_URL, RecipeViewSet, {
+            'search': 'tag 1', 'page_size': 2
+        })
+
+    def test_tag_list_parity(self):
+        """Test tag pages match the tag serializer"""
+        self.assertParity(TAGS_URL, TagViewSet, {
+            'assigned_only': 1, 'page_size': 2
+        })
@@ -0,0 +1,122 @@
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+class ValuesSerializer:
+    """Render list pages from ``values()`` rows instead of model instances
+
+    Wraps a model serializer instance and produces the same representation
+    for its readable fields without building model instances or running
+    DRF's per-field machinery for plain columns. Many to many fields are
+    read from their through table with one query per relation, as pk
+    lists, slug lists or, for nested serializers, as rows of the nested
+    fields. Related objects are listed by ascending pk.
+    """
+    plain_fields = (
+        serializers.BooleanField,
+        serializers.CharField,
+        serializers.IntegerField,
+        serializers.ReadOnlyField,
+    )
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.pk_name = self.model._meta.pk.attname
+        self.columns = []
+        self.relations = []
+        self.layout = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            model_field = self._model_field(field.source)
+            if model_field is not None and model_field.many_to_many:
+                nested = None
+                if isinstance(field, serializers.ListSerializer):
+                    nested = ValuesSerializer(field.child)
+                elif isinstance(field, serializers.ManyRelatedField) and \
+                        isinstance(field.child_relation,
+                                   serializers.SlugRelatedField):
+                    nested = field.child_relation.slug_field
+                self.relations.append((name, model_field, nested))
+                self.layout.append((name, None, None))
+            else:
+                column = (name, field.source, self._converter(field))
+                self.columns.append(column)
+                self.layout.append(column)
+
+    def _model_field(self, source):
+        try:
+            return self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+
+    def _converter(self, field):
+        if isinstance(field, self.plain_fields):
+            return None
+        return field.to_representation
+
+    def values(self, queryset, extra=()):
+        """Return the values() queryset of the rows to serialize
+
+        ``extra`` names further columns to select, such as the ones a
+        paginator reads its cursor position from.
+        """
+        columns = dict.fromkeys(
+            [self.pk_name] + [source for name, source, convert in self.columns]
+            + list(extra)
+        )
+        return queryset.prefetch_related(None).values(*columns)
+
+    def serialize(self, rows):
+        """Return the representation of a page of values() rows"""
+        rows = list(rows)
+        pks = [row[self.pk_name] for row in rows]
+        related = {
+            name: self._related(model_field, nested, pks)
+            for name, model_field, nested in self.relations
+        }
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, convert in self.layout:
+                if source is None:
+                    value = related[name].get(row[self.pk_name], [])
+                else:
+                    value = row[source]
+                    if convert is not None and value is not None:
+                        value = convert(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+    def _related(self, model_field, nested, pks):
+        """Map each pk to its related pks or nested representations"""
+        if not pks:
+            return {}
+        through = model_field.remote_field.through
+        source = f'{model_field.m2m_field_name()}_id'
+        target = model_field.m2m_reverse_field_name()
+        links = through.objects.filter(
+            **{f'{source}__in': pks}
+        ).order_by(f'{target}_id')
+
+        related = defaultdict(list)
+        if not isinstance(nested, ValuesSerializer):
+            column = f'{target}__{nested}' if nested else f'{target}_id'
+            for pk, value in links.values_list(source, column):
+                related[pk].append(value)
+            return related
+
+        columns = [f'{target}__{column}' for name, column, convert
+                   in nested.columns]
+        for pk, *values in links.values_list(source, *columns):
+            item = {}
+            for (name, column, convert), value in zip(nested.columns, values):
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            related[pk].append(item)
+        return related
@@ -1,56 +1,492 @@
-from recipe.serializers import TagSerializer, IngredientSerializer, RecipeSerializer, RecipeDetailSerializer
-from core.models import Tag, Ingredient, Recipe
+import logging
 
-from rest_framework import viewsets, mixins, authentication, permissions
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import StreamingHttpResponse
 
+from recipe.cache import bump_version, cache_response
+from recipe.conditional import conditional_response
+from recipe.graph import METRICS, get_graph, invalidate_graph
+from recipe.importer import FORMATS, RecipeImporter, format_of, parse_rows
+from recipe.filters import (
+    AssignedOnlyFilterBackend, RecipeFilterBackend, RecipeSearchFilterBackend,
+    parse_ids, parse_names, parse_number
+)
+from recipe.renderers import (
+    CSVRenderer, NDJSONRenderer, StreamingJSONRenderer
+)
+from recipe.shopping import build_shopping_list
+from recipe.stats import PRICE_BUCKETS, recipe_stats
+from recipe.values import ValuesSerializer
+from recipe.serializers import (
+    TagSerializer, IngredientSerializer, RecipeSerializer,
+    RecipeDetailSerializer, RecipeBulkItemSerializer,
+    RecipeBulkDeleteSerializer, RecipeAttrNamesSerializer,
+    RecipeExportSerializer, RecipePantrySerializer
+)
+from core.db import iter_chunks
+from core.middleware import serialization_timer
+from core.models import RECIPE_RELATIONS, Tag, Ingredient, Recipe
+from user.authentication import CachedTokenAuthentication
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.CreateModelMixin):
+from rest_framework import viewsets, mixins, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+
+
+logger = logging.getLogger(__name__)
+
+
+class ValuesListMixin:
+    """List pages through ``values_serializer_class`` when one is set
+
+    With ``?stream=1`` the whole unpaginated list is streamed instead,
+    read from a server side cursor and encoded one chunk at a time.
+    """
+    values_serializer_class = None
+    stream_param = 'stream'
+    stream_chunk_size = 500
+
+    def get_ordering(self):
+        """Return the list ordering"""
+        return self.ordering
+
+    def list(self, request, *args, **kwargs):
+        """List the objects, serialized straight from values() rows"""
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.values_serializer_class(self.get_serializer())
+        ordering = [field.lstrip('-') for field in self.get_ordering()]
+        queryset = serializer.values(
+            self.filter_queryset(self.get_queryset()), extra=ordering
+        )
+        if request.query_params.get(self.stream_param) in ('1', 'true'):
+            return self.stream_list(serializer, queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            with serialization_timer(request):
+                data = serializer.serialize(page)
+            return self.get_paginated_response(data)
+        rows = list(queryset)
+        with serialization_timer(request):
+            data = serializer.serialize(rows)
+        return Response(data)
+
+    def stream_list(self, serializer, queryset):
+        """Stream every row as one JSON array with bounded memory"""
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        chunks = (
+            serializer.serialize(chunk)
+            for chunk in iter_chunks(rows, self.stream_chunk_size)
+        )
+        renderer = StreamingJSONRenderer()
+        return StreamingHttpResponse(
+            renderer.render_chunks(chunks), content_type=renderer.media_type
+        )
+
+
+class BaseRecipeAttrViewSet(ValuesListMixin, viewsets.GenericViewSet,
+                            mixins.ListModelMixin, mixins.CreateModelMixin):
     """Base viewset for user owned recipe attributes"""
 
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    filter_backends = (AssignedOnlyFilterBackend,)
+    ordering = ('-name', '-id')
+    orderings = {
+        'name': ordering,
+        'popular': ('-recipe_count', '-id'),
+    }
+    values_serializer_class = ValuesSerializer
+    query_budgets = {'list': 2, 'create': 3, 'bulk': 5}
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
         user = self.request.user
-        return self.queryset.filter(user=user).order_by('-name')
+        return self.queryset.filter(user=user).order_by(*self.get_ordering())
+
+    def get_ordering(self):
+        """Return the ordering picked by ?ordering=name|popular"""
+        name = self.request.query_params.get('ordering', 'name')
+        if name not in self.orderings:
+            raise ValidationError({'ordering': [
+                f'Expected one of {", ".join(self.orderings)}.'
+            ]})
+        return self.orderings[name]
+
+    @conditional_response
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        """List the attrs, served from cache on repeated reads"""
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """Create a new attr"""
-        serializer.save(user=self.request.user)
+        try:
+            with transaction.atomic():
+                serializer.save(user=self.request.user)
+        except IntegrityError:
+            raise ValidationError({'name': ['This name already exists.']})
+        bump_version(self.request.user.pk)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Return the attrs with the given names, creating missing ones"""
+        serializer = RecipeAttrNamesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        names = serializer.validated_data['names']
+
+        found = self.queryset.model.objects.bulk_get_or_create(
+            request.user, names
+        )
+        bump_version(request.user.pk)
+        attrs = [found[name] for name in dict.fromkeys(names)]
+        with serialization_timer(request):
+            data = self.get_serializer(attrs, many=True).data
+        return Response(data)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    recipe_relation = 'tags'
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database"""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    recipe_relation = 'ingredients'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """Manage recipes in the database"""
     serializer_class = RecipeSerializer
+    values_serializer_class = ValuesSerializer
     queryset = Recipe.objects.all()
 
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    filter_backends = (RecipeFilterBackend, RecipeSearchFilterBackend)
+    ordering = ('-title', '-id')
+    search_ordering = ('-search_rank', '-title', '-id')
+    sparse_actions = ('list', 'retrieve', 'similar', 'cookable')
+    columns = ('id', 'title', 'time_minutes', 'price', 'link')
+    export_chunk_size = 1000
+    import_batch_size = 500
+    stats_price_buckets = PRICE_BUCKETS
+    stats_top = 10
+    shopping_list_max_recipes = 100
+    similar_limit = 10
+    similar_max_limit = 100
+    # Budgets are measured by the test suite. The room write budgets leave
+    # for the search vector updates of PostgreSQL is estimated, unverified
+    # until the suite runs against PostgreSQL.
+    query_budgets = {
+        'list': 4, 'retrieve': 4, 'create': 18, 'update': 9,
+        'partial_update': 7, 'destroy': 12, 'bulk': 18, 'export': 4,
+        'import_recipes': 12, 'similar': 7, 'cookable': 7, 'stats': 4,
+        'shopping_list': 1,
+    }
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
         user = self.request.user
-        return self.queryset.filter(user=user).order_by('-title')
+        queryset = self.queryset.filter(user=user).order_by(*self.ordering)
+        return self.apply_query_plan(queryset)
+
+    def apply_query_plan(self, queryset):
+        """Load only the columns and relations the action serializes"""
+        if self.action not in self.sparse_actions:
+            # Updates re-read the relations after saving (DRF drops the
+            # prefetch cache), so prefetching up front would be wasted.
+            return queryset.defer('search_vector')
+
+        fields, expand = self.get_sparse_fields()
+        if self.action == 'retrieve':
+            expand = [relation.name for relation in RECIPE_RELATIONS]
+        ordering = [field.lstrip('-') for field in self.get_ordering()]
+        queryset = queryset.only(*(
+            column for column in self.columns
+            if not fields or column in fields or column in ordering
+        ))
+
+        prefetches = []
+        for relation in RECIPE_RELATIONS:
+            if fields and relation.name not in fields:
+                continue
+            related = ('id',)
+            if relation.name in expand:
+                related = RecipeSerializer.expandable_fields[
+                    relation.name
+                ].Meta.fields
+            prefetches.append(Prefetch(relation.name, queryset=(
+                relation.model.objects.only(*related).order_by('pk')
+            )))
+        return queryset.prefetch_related(*prefetches)
+
+    def get_sparse_fields(self):
+        """Return the fields and the expanded relations to serialize
+
+        ``?fields=id,title`` narrows the representation and ``?expand=tags``
+        inlines tag objects instead of their ids. Expanded relations are
+        always part of the output.
+        """
+        if self.action not in self.sparse_actions:
+            return None, []
+        params = self.request.query_params
+        expand = parse_names(
+            params, 'expand', RecipeSerializer.expandable_fields
+        )
+        fields = parse_names(params, 'fields', RecipeSerializer.Meta.fields)
+        if fields:
+            fields = fields + [name for name in expand if name not in fields]
+        return fields or None, expand
+
+    def get_serializer_context(self):
+        """Pass the requested sparse fieldset on to the serializer"""
+        context = super().get_serializer_context()
+        context['fields'], context['expand'] = self.get_sparse_fields()
+        return context
+
+    def get_ordering(self):
+        """Return the list ordering, by relevance when searching"""
+        search = self.request.query_params.get(
+            RecipeSearchFilterBackend.search_param, ''
+        )
+        if search.strip():
+            return self.search_ordering
+        return self.ordering
+
+    @conditional_response
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        """List the recipes, served from cache on repeated reads"""
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a recipe, served from cache on repeated reads"""
+        recipe = self.get_object()
+        with serialization_timer(request):
+            data = self.get_serializer(recipe).data
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    @conditional_response
+    @cache_response
+    def stats(self, request):
+        """Return aggregate statistics of the (filtered) recipes"""
+        return Response(recipe_stats(
+            self.filter_queryset(self.get_queryset()),
+            self.stats_price_buckets, self.stats_top
+        ))
+
+    @action(detail=False, methods=['get'], url_path='shopping-list')
+    @cache_response
+    def shopping_list(self, request):
+        """Merge the ingredients of the ``?recipes=`` ids into one list
+
+        Every ingredient lists the recipes needing it, and the prices and
+        cooking times of the recipes are summed.
+        """
+        ids = parse_ids(request.query_params, 'recipes')
+        if not ids:
+            raise ValidationError({'recipes': ['This field is required.']})
+        if len(ids) > self.shopping_list_max_recipes:
+            raise ValidationError({'recipes': [
+                f'Ensure this field has no more than '
+                f'{self.shopping_list_max_recipes} elements.'
+            ]})
+        return Response(build_shopping_list(self.get_queryset(), ids))
+
+    @action(detail=True, methods=['get'])
+    @cache_response
+    def similar(self, request, pk=None):
+        """List the user's recipes sharing most ingredients and tags
+
+        ``?metric=`` is ``jaccard`` (default) or ``cosine`` similarity of
+        the ingredient and tag sets, ``?limit=`` caps the results. The
+        ranking depends on every other recipe, so it is not answered with
+        the detail validators of this one and relies on the versioned
+        cache alone.
+        """
+        recipe = get_object_or_404(
+            self.get_queryset().prefetch_related(None).only('pk'), pk=pk
+        )
+        params = request.query_params
+        metric = params.get('metric') or METRICS[0]
+        if metric not in METRICS:
+            raise ValidationError({'metric': [f'Expected one of {METRICS}.']})
+        limit = parse_number(
+            params, 'limit', int, 'Enter a whole number.'
+        ) or self.similar_limit
+        limit = max(1, min(limit, self.similar_max_limit))
+
+        ranked = get_graph(request.user.pk).similar(recipe.pk, limit, metric)
+        return self.ranked_response(
+            [(pk, round(score, 4)) for pk, score in ranked], 'similarity'
+        )
+
+    @action(detail=False, methods=['post'])
+    def cookable(self, request):
+        """List the recipes the posted pantry ingredients cover
+
+        Recipes lacking at most ``missing`` of their ingredients are
+        listed, fewest missing first, with the ids of the missing ones.
+        """
+        serializer = RecipePantrySerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        pantry = serializer.validated_data
+        ranked = get_graph(request.user.pk).cookable(
+            [ingredient.pk for ingredient in pantry['ingredients']],
+            pantry['missing'], pantry['limit']
+        )
+        return self.ranked_response(ranked, 'missing_ingredients')
+
+    def ranked_response(self, ranked, name):
+        """Serialize the ranked (pk, value) recipes, adding the value"""
+        recipes = self.get_queryset().in_bulk([pk for pk, value in ranked])
+        ranked = [(pk, value) for pk, value in ranked if pk in recipes]
+        with serialization_timer(self.request):
+            data = self.get_serializer(
+                [recipes[pk] for pk, value in ranked], many=True
+            ).data
+        for item, (pk, value) in zip(data, ranked):
+            item[name] = value
+        return Response(data)
 
     def get_serializer_class(self):
         """Return appropriate serializer class"""
         if self.action == 'retrieve':
             return RecipeDetailSerializer
+        if self.action == 'bulk':
+            return RecipeBulkItemSerializer
         return self.serializer_class
 
     def perform_create(self, serializer):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
+        bump_version(self.request.user.pk)
+
+    def perform_update(self, serializer):
+        """Update a recipe"""
+        serializer.save()
+        bump_version(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        """Delete a recipe"""
+        instance.delete()
+        bump_version(self.request.user.pk)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """Create, update or delete a list of recipes in one transaction"""
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+
+        if request.method == 'PATCH':
+            serializer = self.get_serializer(
+                self.get_queryset(), data=request.data, many=True,
+                partial=True
+            )
+            serializer.is_valid(raise_exception=True)
+            recipes = serializer.save()
+        else:
+            serializer = self.get_serializer(data=request.data, many=True)
+            serializer.is_valid(raise_exception=True)
+            recipes = serializer.save(user=request.user)
+        bump_version(request.user.pk)
+        # The through rows were written without m2m_changed signals
+        invalidate_graph(request.user.pk)
+
+        prefetch_related_objects(recipes, 'ingredients', 'tags')
+        with serialization_timer(request):
+            data = RecipeSerializer(recipes, many=True).data
+        if request.method == 'PATCH':
+            return Response(data)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def bulk_destroy(self, request):
+        """Delete the listed recipes, all or none"""
+        queryset = self.get_queryset()
+        serializer = RecipeBulkDeleteSerializer(
+            data=request.data, context={'queryset': queryset}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.delete()
+        bump_version(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['get'],
+            renderer_classes=(NDJSONRenderer, CSVRenderer))
+    def export(self, request):
+        """Stream the user's recipes as NDJSON or CSV"""
+        serializer = ValuesSerializer(RecipeExportSerializer())
+        queryset = serializer.values(
+            self.filter_queryset(self.get_queryset())
+        ).order_by('pk')
+        total = queryset.count()
+
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        header = list(RecipeExportSerializer.Meta.fields)
+        response = StreamingHttpResponse(
+            renderer.render_chunks(
+                self.iter_export(serializer, queryset, total),
+                {'header': header}
+            ),
+            content_type=content_type
+        )
+        response['X-Total-Count'] = total
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{renderer.format}"'
+        )
+        return response
+
+    def iter_export(self, serializer, queryset, total):
+        """Yield serialized chunks of the export, logging progress"""
+        exported = 0
+        rows = queryset.iterator(chunk_size=self.export_chunk_size)
+        for chunk in iter_chunks(rows, self.export_chunk_size):
+            yield serializer.serialize(chunk)
+            exported += len(chunk)
+            logger.info(
+                'Exported %d of %d recipes of user %s',
+                exported, total, self.request.user.pk
+            )
+
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=(MultiPartParser,))
+    def import_recipes(self, request):
+        """Import an uploaded NDJSON or CSV file of recipes
+
+        ``start`` skips the rows a previous upload already imported, as
+        reported by its ``checkpoint``.
+        """
+        upload = request.data.get('file')
+        if upload is None:
+            raise ValidationError({'file': ['No file was submitted.']})
+        try:
+            start = int(request.data.get('start') or 0)
+        except ValueError:
+            raise ValidationError({'start': ['A valid integer is required.']})
+
+        fmt = request.data.get('format') or format_of(upload.name)
+        if fmt not in FORMATS:
+            raise ValidationError({'format': [f'Expected one of {FORMATS}.']})
+        importer = RecipeImporter(
+            request.user, batch_size=self.import_batch_size
+        )
+        result = importer.run(parse_rows(upload, fmt), start=start)
+        return Response(result.as_dict())
@@ -0,0 +1,36 @@
+import copy
+import hashlib
+
+from rest_framework import authentication
+
+from core.cache import get_cache
+
+
+CACHE_SETTING = 'TOKEN_AUTH_CACHE'
+
+
+def get_token_cache():
+    """Return the backend holding authenticated token owners"""
+    return get_cache(CACHE_SETTING)
+
+
+def token_cache_key(key):
+    """Return the cache key of an auth token"""
+    return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """Token authentication remembering token owners in a bounded cache"""
+
+    def authenticate_credentials(self, key):
+        """Return the (user, token) pair, querying only on a cache miss"""
+        cache = get_token_cache()
+        cached = cache.get(token_cache_key(key))
+        if cached is not None:
+            user, token = cached
+            # Views may modify request.user, keep the cached copy pristine
+            return copy.copy(user), token
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(token_cache_key(key), (user, token))
+        return user, token
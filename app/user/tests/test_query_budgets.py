@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.tests.helpers import QueryBudgetMixin, routed_handlers
+from user import urls
+from user.views import CreateUserView, CreateTokenView, ManageUserView
+
+CREATE_USER_URL = reverse('user:create')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+
+class UserQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test user endpoints run a bounded number of queries
+
+    The related rows are other accounts and their tokens, the rows the
+    email, username and token lookups of these endpoints search.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com',
+            'testtest',
+            username='test'
+        )
+
+    def add_users(self, count):
+        """Bring the accounts, each with a token, to count"""
+        existing = get_user_model().objects.count()
+        get_user_model().objects.bulk_create([
+            get_user_model()(email=f'user{i}@gmail.com', username=f'user{i}')
+            for i in range(existing, count)
+        ])
+        Token.objects.bulk_create([
+            Token(user=user, key=Token().generate_key())
+            for user in get_user_model().objects.filter(
+                auth_token__isnull=True
+            ).exclude(pk=self.user.pk)
+        ])
+
+    def test_create_user(self):
+        self.assertQueryBudget(
+            CreateUserView, 'post',
+            lambda rows: self.client.post(CREATE_USER_URL, {
+                'email': f'new{rows}@gmail.com',
+                'password': 'testtest',
+                'username': f'new{rows}'
+            }),
+            self.add_users
+        )
+
+    def test_create_token(self):
+        def add_rows(rows):
+            # Budget the first login, which also creates the token
+            Token.objects.filter(user=self.user).delete()
+            self.add_users(rows)
+
+        self.assertQueryBudget(
+            CreateTokenView, 'post',
+            lambda rows: self.client.post(TOKEN_URL, {
+                'email': 'test@gmail.com', 'password': 'testtest'
+            }),
+            add_rows
+        )
+
+    def test_manage_user(self):
+        # The token cache is cleared before each request, so the budgets
+        # include looking the token up
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertQueryBudget(
+            ManageUserView, 'get',
+            lambda rows: self.client.get(ME_URL), self.add_users
+        )
+        self.assertQueryBudget(
+            ManageUserView, 'put',
+            lambda rows: self.client.put(ME_URL, {
+                'email': 'test@gmail.com',
+                'password': 'newpassword',
+                'username': f'renamed{rows}'
+            }),
+            self.add_users
+        )
+        self.assertQueryBudget(
+            ManageUserView, 'patch',
+            lambda rows: self.client.patch(
+                ME_URL, {'username': f'patched{rows}'}
+            ),
+            self.add_users
+        )
+
+
+class UserRouteBudgetTests(TestCase):
+    """Test every user route declares a query budget"""
+
+    def test_routes_have_budgets(self):
+        for name, view, method in routed_handlers(urls.urlpatterns):
+            self.assertIn(
+                method, getattr(view, 'query_budgets', {}),
+                f'{view.__name__} has no query budget for {method}'
+            )